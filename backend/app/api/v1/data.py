@@ -3,6 +3,10 @@ from sqlmodel import Session, delete
 
 from app.core.database import get_session
 from app.models.chat import ChatSession
+from app.services.conversion_cache import conversion_cache
+from app.services.embedding_cache import embedding_cache
+from app.services.query_cache import query_cache
+from app.services.document_registry_service import document_registry_service
 from app.services.vector_service import vector_service
 
 router = APIRouter(prefix="/data", tags=["Data"])
@@ -14,10 +18,22 @@ def get_stats():
     return vector_service.get_stats()
 
 
+@router.get("/cache")
+def get_cache_stats():
+    """Return size and hit/miss counters of the conversion, embedding and query caches."""
+    return {
+        "conversion": conversion_cache.stats(),
+        "embedding": embedding_cache.stats(),
+        "query": query_cache.stats(),
+    }
+
+
 @router.delete("/vector")
-def clear_vector_store():
+def clear_vector_store(db: Session = Depends(get_session)):
     """Delete all points from the Qdrant collection (recreate empty)."""
     vector_service.clear_all()
+    # Nothing is indexed any more — forget content hashes so re-uploads ingest
+    document_registry_service.clear(db)
     return {"message": "Vector store cleared"}
 
 
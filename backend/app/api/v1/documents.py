@@ -1,4 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from app.core.database import get_session
+from app.services.document_registry_service import document_registry_service
 from app.services.retrieval_service import retrieval_service
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
@@ -10,9 +14,10 @@ async def get_documents():
 
 
 @router.delete("/{document_id}")
-async def delete_document(document_id: str):
+async def delete_document(document_id: str, db: Session = Depends(get_session)):
     try:
         await retrieval_service.delete_document_by_id(document_id)
+        document_registry_service.remove_document(db, document_id)
         return {"message": f"Document {document_id} removed from Vector DB"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,57 +1,280 @@
-import uuid
-from fastapi import APIRouter, UploadFile, File
-from app.services.file_service import file_service
-from app.services.chunking_service import chunking_service
-from app.services.vector_service import vector_service
+import re
+from typing import List, Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Header, Request, status
+from pydantic import BaseModel, Field
+from sqlmodel import Session
+
+from app.core.database import get_session
+from app.services.document_registry_service import document_registry_service
+from app.services.file_service import BulkEntry, BulkUpload, SpooledUpload, file_service
+from app.services.ingest_service import ingest_service
+from app.services.upload_service import upload_service
 
 router = APIRouter(prefix="/ingest", tags=["Ingestion"])
 
 
-@router.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    await file_service.validate_file(file)
+class FileDescriptor(BaseModel):
+    file_name: str
+    size: int
+    sha256: str = Field(pattern=r"^[0-9a-fA-F]{64}$")
+    source_path: Optional[str] = None
+    profile: Optional[str] = None
+
+
+class NegotiateRequest(BaseModel):
+    files: List[FileDescriptor]
+
+
+class CreateUploadRequest(BaseModel):
+    file_name: str
+    size: int = Field(gt=0)
+    sha256: Optional[str] = Field(default=None, pattern=r"^[0-9a-fA-F]{64}$")
+    source_path: Optional[str] = None
+    profile: Optional[str] = None
 
-    # file_service now returns (content, file_type)
-    raw_content, file_type = await file_service.process_file(file)
-
-    # Convert tabular / structured bytes into plain text
-    if file_type == "csv":
-        final_content = chunking_service.process_csv(raw_content)
-        file_type = "text"
-    elif file_type == "xlsx":
-        final_content = chunking_service.process_xlsx(raw_content)
-        file_type = "text"
-    elif file_type == "json":
-        final_content = chunking_service.process_json(raw_content)
-        file_type = "text"
-    elif file_type in {"text", "code"}:
-        # Decode bytes to string for text / source-code paths
-        final_content = (
-            raw_content.decode("utf-8", errors="ignore")
-            if isinstance(raw_content, bytes)
-            else str(raw_content)
-        )
-    else:
-        # "docling" — pass DoclingDocument directly
-        final_content = raw_content
 
-    document_id = str(uuid.uuid4())
+# "bytes <start>-<end>/<total>"
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
 
-    chunks = chunking_service.split_content(
-        final_content,
-        file.filename,
-        document_id,
-        file_type=file_type,
+
+def _queue_upload(
+    upload: SpooledUpload,
+    file_name: str,
+    source_path: Optional[str],
+    profile: Optional[str],
+    db: Session,
+) -> dict:
+    """Answer a dedup hit from the registry, otherwise start an ingestion job."""
+    existing = document_registry_service.find_indexed(
+        db, upload.sha256, source_path, file_service.converted_with(file_name, profile)
+    )
+    if existing:
+        upload.path.unlink(missing_ok=True)
+        return {
+            "job_id": None,
+            "document_id": existing.document_id,
+            "file_name": file_name,
+            "status": "completed",
+            "dedup": True,
+            "total_chunks": existing.total_chunks,
+            "message": f"Identical file already indexed as '{existing.file_name}'",
+        }
+
+    job = ingest_service.submit(
+        upload.path, file_name, upload.sha256, source=source_path, profile=profile
     )
 
-    vector_service.upsert_chunks(chunks)
+    return {
+        "job_id": job.id,
+        "document_id": job.document_id,
+        "file_name": job.file_name,
+        "status": job.status,
+        "dedup": False,
+        "message": "File accepted for ingestion",
+    }
+
+
+@router.post("/negotiate")
+async def negotiate_upload(body: NegotiateRequest, db: Session = Depends(get_session)):
+    """Tell a client which files it actually needs to upload.
+
+    Takes (file name, size, SHA-256) for every candidate file and splits them
+    into:
+      - needed:    unknown content — upload these (``resumable: true`` when
+                   the file is over the single-request limit)
+      - indexed:   byte-identical content is already indexed for the same
+                   source_path and conversion profile (with its document_id)
+      - duplicates: same content and source_path as an earlier entry in this request
+      - rejected:  unsupported extension or too large
+    """
+    needed, indexed, duplicates, rejected = [], [], [], []
+    candidates: List[FileDescriptor] = []
+    for f in body.files:
+        # Anything up to the resumable limit can be sent via /ingest/uploads
+        problem = file_service.unsupported_reason(
+            f.file_name, f.size, max_size=file_service.max_resumable_size
+        )
+        file_service.check_profile(f.profile)
+        if problem:
+            rejected.append({**f.model_dump(), "reason": problem[1]})
+        else:
+            candidates.append(f)
+
+    known = document_registry_service.find_by_hashes(
+        db, {f.sha256.lower() for f in candidates}
+    )
+    first_seen: dict[tuple, str] = {}
+    for f in candidates:
+        digest = f.sha256.lower()
+        source_path = f.source_path or None
+        profile = file_service.converted_with(f.file_name, f.profile)
+        doc = next(
+            (d for d in known.get(digest, []) if document_registry_service.matches(d, source_path, profile)),
+            None,
+        )
+        if doc:
+            indexed.append({**f.model_dump(), "document_id": doc.document_id})
+        elif (digest, source_path) in first_seen:
+            duplicates.append({**f.model_dump(), "duplicate_of": first_seen[digest, source_path]})
+        else:
+            first_seen[digest, source_path] = source_path or f.file_name
+            needed.append({**f.model_dump(), "resumable": f.size > file_service.max_file_size})
+
+    return {
+        "needed": needed,
+        "indexed": indexed,
+        "duplicates": duplicates,
+        "rejected": rejected,
+    }
+
+
+@router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
+async def upload_document(
+    file: UploadFile = File(...),
+    source_path: Optional[str] = Form(None),
+    profile: Optional[str] = Form(None),
+    db: Session = Depends(get_session),
+):
+    """Accept a file and queue it for background ingestion.
+
+    ``source_path`` (e.g. the path inside an uploaded folder) identifies the
+    document across re-uploads: re-uploading an edited file only re-embeds
+    the chunks that changed. Without it every upload is a new document.
 
+    ``profile`` picks the Docling conversion profile for PDFs, e.g. "fast"
+    (no OCR / table structure) for born-digital files or "accurate"; it
+    defaults to the per-extension / global setting.
+
+    Byte-identical files that are already indexed are answered immediately
+    with the existing document_id (``dedup: true``, no job is created).
+    Otherwise poll GET /ingest/jobs/{job_id} for stage, progress and the
+    final result.
+    """
+    await file_service.validate_file(file)
+    file_service.check_profile(profile)
+
+    upload = await file_service.spool_upload(file)
+    return _queue_upload(upload, file.filename, source_path or None, profile, db)
+
+
+@router.post("/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def bulk_upload(
+    files: List[UploadFile] = File(...),
+    source_paths: Optional[List[str]] = Form(None),
+    profile: Optional[str] = Form(None),
+):
+    """Ingest many files, or zip / tar archives, as one pipelined job.
+
+    Parsing, chunking, embedding and upserting overlap across files, so the
+    embedder keeps working while Docling converts the next document.
+    ``source_paths`` (one per file, e.g. paths inside an uploaded folder)
+    identify documents like in /upload (files without one become new
+    documents). Archive members are reported as ``<archive>/<path inside>``
+    and identify documents only when the archive has a source path. Unsupported files are reported as skipped rather than
+    failing the request. ``profile`` applies to every file (see /upload).
+
+    Poll GET /ingest/jobs/{job_id}; the final result reports per-file
+    outcomes plus files/sec and chunks/sec.
+    """
+    if source_paths and len(source_paths) != len(files):
+        raise HTTPException(status_code=400, detail="source_paths must have one entry per file")
+    file_service.check_profile(profile)
+
+    entries: List[BulkEntry] = []
+    archives: List[BulkEntry] = []
+    try:
+        for i, file in enumerate(files):
+            has_path = bool(source_paths and source_paths[i])
+            source = source_paths[i] if has_path else file.filename
+            if file_service.is_archive(file.filename):
+                spooled = await file_service.spool_upload(file, max_size=file_service.max_resumable_size)
+                archives.append(BulkEntry(source=source, upload=spooled, has_path=has_path))
+                continue
+            problem = file_service.unsupported_reason(file.filename, file.size or 0)
+            if problem:
+                entries.append(BulkEntry(source=source, skipped=problem[1], has_path=has_path))
+                continue
+            entries.append(BulkEntry(
+                source=source, upload=await file_service.spool_upload(file), has_path=has_path
+            ))
+    except BaseException:
+        BulkUpload(entries, archives).close()
+        raise
+
+    label = files[0].filename if len(files) == 1 else f"{len(files)} uploads"
+    job = ingest_service.submit_bulk(label, BulkUpload(entries, archives), profile=profile)
     return {
-        "document_id": document_id,
-        "file_name": file.filename,
-        "file_type": file_type,
-        "total_chunks": len(chunks),
-        "chunks_preview": chunks[:3],
-        "status": "success",
-        "message": f"Successfully indexed {len(chunks)} chunks into Vector DB",
+        "job_id": job.id,
+        "file_name": job.file_name,
+        "status": job.status,
+        "message": f"{len(entries)} files and {len(archives)} archives accepted for ingestion",
     }
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = ingest_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+# ---------------------------------------------------------------------------
+# Resumable uploads (files over the single-request limit)
+# ---------------------------------------------------------------------------
+
+@router.post("/uploads", status_code=status.HTTP_201_CREATED)
+async def create_upload(body: CreateUploadRequest):
+    """Start a resumable upload. Send the bytes with PUT /ingest/uploads/{id}."""
+    file_service.check_profile(body.profile)
+    upload = upload_service.create(
+        body.file_name, body.size, body.sha256, body.source_path, body.profile
+    )
+    return upload.to_dict()
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """Current offset of an upload — resume a dropped transfer from here."""
+    upload = upload_service.get(upload_id)
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload.to_dict()
+
+
+@router.put("/uploads/{upload_id}")
+async def put_upload_range(
+    upload_id: str,
+    request: Request,
+    content_range: str = Header(...),
+):
+    """Append ``Content-Range: bytes <start>-<end>/<total>`` to the upload.
+
+    The body is streamed to disk as it arrives. ``start`` must equal the
+    current offset and the body must hold exactly ``end - start + 1`` bytes;
+    on a dropped connection, GET the upload and resume there.
+    """
+    match = _CONTENT_RANGE.match(content_range.strip())
+    if not match:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range header")
+    start, end, total = (int(g) for g in match.groups())
+    if end < start:
+        raise HTTPException(status_code=400, detail="Invalid Content-Range header")
+
+    upload = await upload_service.write_range(upload_id, start, end, total, request.stream())
+    return upload.to_dict()
+
+
+@router.post("/uploads/{upload_id}/finalize", status_code=status.HTTP_202_ACCEPTED)
+async def finalize_upload(upload_id: str, db: Session = Depends(get_session)):
+    """Verify a complete upload and queue it for ingestion (same response as /upload)."""
+    session, spooled = await upload_service.finalize(upload_id)
+    return _queue_upload(spooled, session.file_name, session.source_path or None, session.profile, db)
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    if not upload_service.get(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    upload_service.abort(upload_id)
+    return {"message": f"Upload {upload_id} discarded"}
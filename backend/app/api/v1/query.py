@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from app.services.query_batcher import query_batcher
 from app.services.retrieval_service import retrieval_service
 
 router = APIRouter(prefix="/query", tags=["Retrieval"])
@@ -14,4 +15,10 @@ async def search_documents(q: str):
         "query": q,
         "count": len(relevant_chunks),
         "results": relevant_chunks
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/stats")
+def get_query_stats():
+    """Return queue-time and batch-size histograms of query embedding."""
+    return {"embedding_batcher": query_batcher.stats()}
@@ -4,12 +4,29 @@ from typing import Literal
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 DOTENV_PATH = Path(__file__).resolve().parent.parent.parent.parent / ".env"
+BACKEND_DIR = Path(__file__).resolve().parent.parent.parent
 
 class QdrantSettings(BaseSettings):
     """Configuration for the Vector Database."""
     HOST: str = "qdrant"
     PORT: int = 6333
     COLLECTION_NAME: str = "doc_rag_knowledge"
+    # Points sent per upsert request
+    UPSERT_BATCH: int = 256
+    # Talk to Qdrant over gRPC (GRPC_PORT) instead of REST: less
+    # serialization overhead for searches and large upserts
+    PREFER_GRPC: bool = False
+    GRPC_PORT: int = 6334
+
+    @property
+    def client_options(self) -> dict:
+        """Keyword arguments for QdrantClient / AsyncQdrantClient."""
+        return {
+            "host": self.HOST,
+            "port": self.PORT,
+            "grpc_port": self.GRPC_PORT,
+            "prefer_grpc": self.PREFER_GRPC,
+        }
 
 class LLMSettings(BaseSettings):
     """Configuration for AI Providers."""
@@ -31,6 +48,100 @@ class DatabaseSettings(BaseSettings):
     def URL(self) -> str:
         return f"postgresql://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.NAME}"
 
+class EmbeddingSettings(BaseSettings):
+    """Configuration for document embedding (fastembed)."""
+    # Texts per ONNX inference call
+    BATCH_SIZE: int = 64
+    # Embedding worker processes, each with its own copy of the model and an
+    # equal share of the cores. 1 → embed in the API process; 0 → one per core.
+    WORKERS: int = 1
+    # On-disk cache of computed vectors (DATA_DIR, LRU); 0 disables it
+    CACHE_MAX_MB: int = 1024
+    # Concurrent search queries are embedded together: a batch is sent once
+    # this many are waiting or the oldest has waited QUERY_MAX_WAIT_MS
+    QUERY_BATCH_SIZE: int = 32
+    QUERY_MAX_WAIT_MS: float = 5.0
+    # In-memory LRU of query vectors (entries; 0 disables it) and their lifetime
+    QUERY_CACHE_SIZE: int = 2048
+    QUERY_CACHE_TTL_SECONDS: float = 3600.0
+
+    @property
+    def workers(self) -> int:
+        return self.WORKERS or os.cpu_count() or 1
+
+class IngestSettings(BaseSettings):
+    """Configuration for the background ingestion pipeline."""
+    # Jobs processed concurrently (parse → chunk → embed → upsert).
+    # 0 → one per conversion worker so the Docling pool is never starved.
+    WORKERS: int = 0
+    # Finished jobs kept in memory for GET /ingest/jobs/{id}
+    JOB_HISTORY: int = 500
+
+    # Size limit for single-request uploads (POST /ingest/upload)
+    MAX_UPLOAD_MB: int = 20
+    # Size limit for resumable uploads (POST /ingest/uploads …)
+    MAX_RESUMABLE_UPLOAD_MB: int = 2048
+    # Unfinished resumable uploads are discarded after this many hours
+    RESUMABLE_UPLOAD_TTL_HOURS: int = 24
+
+    # Workbooks at least this large are streamed row by row (openpyxl
+    # read-only) instead of loaded into pandas, so memory stays flat
+    XLSX_STREAMING_MB: int = 8
+    # JSON files at least this large are parsed incrementally instead of with
+    # json.loads (slower, but memory no longer grows with the file)
+    JSON_STREAMING_MB: int = 8
+    # Chunks diffed, embedded and upserted per step within one document
+    STREAM_BATCH: int = 256
+
+    # Near-duplicate suppression: a chunk whose SimHash is within this many
+    # bits (of 64) of an earlier chunk of the same document is dropped as
+    # boilerplate. -1 disables it; the default 0 only drops exact (normalized)
+    # repeats, since larger distances also drop chunks that differ in a number.
+    DEDUP_MAX_DISTANCE: int = 0
+    # Only these file types are de-duplicated; near-identical CSV / JSON
+    # windows usually differ in data that matters
+    DEDUP_FILE_TYPES: list[str] = ["docling", "text"]
+    # Also drop chunks that near-duplicate a chunk of another indexed document
+    DEDUP_ACROSS_DOCUMENTS: bool = False
+
+    # Bulk ingestion (POST /ingest/bulk): items buffered between pipeline stages
+    BULK_QUEUE_SIZE: int = 8
+    # Chunks from several small files are embedded together up to this count
+    BULK_EMBED_BATCH: int = 256
+    # Archive guards: max members and max total extracted size
+    BULK_MAX_FILES: int = 10000
+    BULK_MAX_EXTRACTED_MB: int = 8192
+
+    # Docling conversion process pool. 0 → half the CPU cores; each worker
+    # keeps its own pre-loaded layout/OCR models (~1–2 GB RSS).
+    CONVERSION_WORKERS: int = 0
+    # A conversion running longer than this (seconds) is killed
+    CONVERSION_TIMEOUT: float = 600.0
+    # A worker whose RSS grows beyond this (MB) is killed; 0 disables the cap
+    CONVERSION_MAX_MEMORY_MB: int = 6144
+    # On-disk cache of converted DoclingDocuments (LRU); 0 disables it
+    CONVERSION_CACHE_MAX_MB: int = 2048
+
+    # Named PDF pipeline profiles → docling PdfPipelineOptions fields. Every
+    # worker pre-builds one converter per profile. "fast" skips OCR and the
+    # table-structure model, which is wasted work on born-digital PDFs.
+    CONVERSION_PROFILES: dict[str, dict] = {
+        "accurate": {"do_ocr": True, "do_table_structure": True},
+        "fast": {"do_ocr": False, "do_table_structure": False},
+    }
+    # Profile used when an upload does not name one …
+    CONVERSION_PROFILE: str = "accurate"
+    # … unless its extension has an entry here, e.g. {".pdf": "fast"}
+    CONVERSION_PROFILE_BY_EXTENSION: dict[str, str] = {}
+
+    @property
+    def conversion_workers(self) -> int:
+        return self.CONVERSION_WORKERS or max(1, (os.cpu_count() or 2) // 2)
+
+    @property
+    def workers(self) -> int:
+        return self.WORKERS or self.conversion_workers
+
 class Settings(BaseSettings):
     """Global Application Settings."""
     # App Config
@@ -47,10 +158,15 @@ class Settings(BaseSettings):
     # embedding model just to count tokens.
     CHUNK_TOKENIZER: str = "sentence-transformers/all-MiniLM-L6-v2"
 
+    # Local working directory for caches and other on-disk state
+    DATA_DIR: Path = BACKEND_DIR / "data"
+
     # Nested Settings
     QDRANT: QdrantSettings = QdrantSettings()
     LLM: LLMSettings = LLMSettings()
     DB: DatabaseSettings = DatabaseSettings()
+    INGEST: IngestSettings = IngestSettings()
+    EMBEDDING: EmbeddingSettings = EmbeddingSettings()
 
     model_config = SettingsConfigDict(
         env_file=DOTENV_PATH if DOTENV_PATH.exists() else None,
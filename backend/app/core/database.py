@@ -23,6 +23,39 @@ def _migrate():
         conn.execute(text(
             "ALTER TABLE chatmessage ADD COLUMN IF NOT EXISTS detected_mode VARCHAR(50)"
         ))
+        # Source path of registered documents, for content-hash dedup
+        conn.execute(text(
+            "ALTER TABLE indexeddocument ADD COLUMN IF NOT EXISTS source_path VARCHAR"
+        ))
+        # Conversion profile of registered documents, for content-hash dedup
+        conn.execute(text(
+            "ALTER TABLE indexeddocument ADD COLUMN IF NOT EXISTS profile VARCHAR"
+        ))
+        # The registry used to be keyed by content hash, which allowed only
+        # one document per content; key it by document instead
+        conn.execute(text(
+            """
+            DO $$ BEGIN
+                IF EXISTS (
+                    SELECT 1 FROM information_schema.key_column_usage
+                    WHERE table_name = 'indexeddocument'
+                      AND constraint_name = 'indexeddocument_pkey'
+                      AND column_name = 'content_hash'
+                ) THEN
+                    ALTER TABLE indexeddocument DROP CONSTRAINT indexeddocument_pkey;
+                    ALTER TABLE indexeddocument ADD PRIMARY KEY (document_id);
+                END IF;
+            END $$
+            """
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_indexeddocument_content_hash ON indexeddocument (content_hash)"
+        ))
+        # Profiles only apply to PDFs; other documents are registered without one
+        conn.execute(text(
+            "UPDATE indexeddocument SET profile = NULL "
+            "WHERE profile IS NOT NULL AND lower(file_name) NOT LIKE '%.pdf'"
+        ))
         conn.commit()
 
 def get_session():
@@ -7,7 +7,14 @@ from app.core.config import settings
 from app.api.v1 import ingest, query, chat, documents, models, settings as settings_router, data as data_router
 from app.core.exceptions import global_exception_handler
 from app.core.database import init_db
+from app.services.conversion_pool import conversion_pool
+from app.services.embedding_pool import embedding_pool
+from app.services.file_service import file_service
+from app.services.query_batcher import query_batcher
+from app.services.retrieval_service import retrieval_service
+from app.services.upload_service import upload_service
 from app.models.settings import AppSetting as _AppSetting  # noqa: F401 — ensures AppSetting table is registered
+from app.models.document import IndexedDocument as _IndexedDocument  # noqa: F401 — ensures IndexedDocument table is registered
 
 # Fetch version from pyproject.toml (Standard for 2026)
 try:
@@ -43,6 +50,23 @@ app.add_exception_handler(Exception, global_exception_handler)
 @app.on_event("startup")
 def on_startup():
     init_db()
+    # Jobs do not survive a restart — drop their orphaned upload files
+    file_service.purge_spool()
+    upload_service.purge_expired()
+    # Spawn Docling workers now so models are warm before the first upload
+    conversion_pool.start()
+    if embedding_pool.size > 1:
+        embedding_pool.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    conversion_pool.shutdown()
+    embedding_pool.shutdown()
+    query_batcher.shutdown()
+
+@app.on_event("shutdown")
+async def close_clients():
+    await retrieval_service.close()
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+
+class IndexedDocument(SQLModel, table=True):
+    """Registry of ingested files: the SHA-256 of each document's current bytes."""
+    document_id: str = Field(primary_key=True)
+    # Several documents may hold the same bytes (e.g. from different sources)
+    content_hash: str = Field(index=True, max_length=64)
+    file_name: str
+    # Path the document was uploaded from; None → uploaded without one
+    source_path: Optional[str] = Field(default=None)
+    # Conversion profile it was indexed with; None → not converted by Docling
+    profile: Optional[str] = Field(default=None)
+    size: int = Field(default=0)
+    total_chunks: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,15 +1,23 @@
+import collections
+import hashlib
 import io
+import itertools
 import json
 import re
 import uuid
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Iterable, Iterator, List, Optional
 
+import numpy as np
 import pandas as pd
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
 from docling_core.types.doc.document import DoclingDocument
 
 from app.core.config import settings
+from app.services.json_stream import Leaf, flatten_json, iter_json_leaves
+from app.services.near_duplicates import band_keys
 
 # ── Language detection ────────────────────────────────────────────────────────
 
@@ -62,16 +70,146 @@ _SPLIT_PATTERN: dict[str, str] = {
 }
 
 
+# Fixed namespace for deterministic document / chunk ids (uuid5). Never change
+# it — doing so would orphan every point already stored in Qdrant.
+_ID_NAMESPACE = uuid.UUID("3eac3955-559f-4e2e-81cf-2105f4c90820")
+
+
+@dataclass
+class TableSheet:
+    """A parsed CSV file or XLSX sheet, ready for row-window chunking."""
+    name: Optional[str]      # sheet name; None for CSV
+    columns: List[str]
+    rows: Iterable[str]      # "col: val, …" per data row; "" for empty rows.
+                             # A generator when the workbook is streamed.
+
+
+@dataclass(slots=True, frozen=True)
+class DocumentInfo:
+    """Metadata shared by every chunk of a document (one instance per document)."""
+    document_id: str
+    file_name: str
+
+
+@lru_cache(maxsize=256)
+def _document_info(document_id: str, file_name: str) -> DocumentInfo:
+    return DocumentInfo(document_id, file_name)
+
+
+@dataclass(slots=True)
+class Chunk:
+    """One chunk on its way from the chunker to Qdrant.
+
+    Per-document fields live in a shared DocumentInfo and format-specific
+    metadata (page_number, sheet, json_path, …) in ``extra``, which may be
+    shared between chunks; the metadata dict is only built for the payload.
+    """
+    content: str
+    document: DocumentInfo
+    index: int
+    token_count: int = 0
+    extra: Optional[dict] = None
+    id: str = ""                 # set by _assign_ids()
+    digest: bytes = b""          # SHA-256 of the content, set with the id
+    simhash: Optional[int] = None  # set by NearDuplicateFilter
+
+    @property
+    def metadata(self) -> dict:
+        meta = {
+            "document_id": self.document.document_id,
+            "file_name": self.document.file_name,
+            "chunk_index": self.index,
+            "char_count": len(self.content),
+            "token_count": self.token_count,
+        }
+        if self.extra:
+            meta.update(self.extra)
+        if self.digest:
+            meta["content_hash"] = self.digest.hex()
+        return meta
+
+    def to_payload(self) -> dict:
+        """The Qdrant payload stored for this chunk."""
+        payload = {"content": self.content, "metadata": self.metadata}
+        if self.simhash is not None:
+            # Outside the metadata so diffing re-uploads ignores it
+            payload["simhash"] = f"{self.simhash:016x}"
+            payload["simhash_bands"] = band_keys(self.simhash, settings.INGEST.DEDUP_MAX_DISTANCE)
+        return payload
+
+
+def document_id_for(source: str) -> str:
+    """Stable document id for a file, derived from its source path.
+
+    Re-uploading the same source maps to the same document so its chunks can be
+    diffed against what is already indexed instead of being duplicated. Only
+    meant for real paths; a bare file name would merge unrelated files.
+    """
+    return str(uuid.uuid5(_ID_NAMESPACE, f"doc:{source}"))
+
+
+# A sentence ends at . ! or ? followed by whitespace (kept with the sentence)
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]*\s+")
+
+
+def _docling_meta(chunk) -> Optional[dict]:
+    """Structural info of a Docling chunk: section title, element type, page."""
+    meta = getattr(chunk, "meta", None)
+    if not meta:
+        return None
+    extra: dict = {}
+    headings = getattr(meta, "headings", None)
+    if headings:
+        extra["section_title"] = headings[-1]
+    doc_items = getattr(meta, "doc_items", None)
+    if doc_items:
+        item = doc_items[0]
+        label = getattr(item, "label", None)
+        if label is not None:
+            extra["element_type"] = str(label)
+        prov = getattr(item, "prov", None)
+        if prov and hasattr(prov[0], "page_no"):
+            extra["page_number"] = prov[0].page_no
+    return extra
+
+
+def _json_line(path: str, value: Any) -> str:
+    return f"{path}: {value}"
+
+
+def _json_depth(path: str) -> int:
+    """Number of segments in a JSON path: "" → 0, "rows[3].id" → 3."""
+    return path.count(".") + path.count("[") + (1 if path and path[0] not in ".[" else 0)
+
+
+def _common_json_path(paths: List[str]) -> str:
+    """Longest JSON path shared by all paths, e.g. rows[3].id, rows[4].id → rows."""
+    prefix = min(paths)
+    last = max(paths)
+    n = 0
+    while n < len(prefix) and prefix[n] == last[n]:
+        n += 1
+    if all(len(p) == n or p[n] in ".[" for p in (prefix, last)):
+        return prefix[:n]
+    # Cut back to the last complete path segment
+    return prefix[: max(prefix.rfind(".", 0, n), prefix.rfind("[", 0, n), 0)]
+
+
 class ChunkingService:
-    # Chars per chunk for plain-text / code fallback
-    CHUNK_SIZE = 1200
-    # Overlap keeps context at boundaries (≈16% of chunk)
-    OVERLAP = 200
+    # Token budget per chunk (CHUNK_TOKENIZER tokens)
+    MAX_TOKENS = 512
+    # Tokens repeated from the end of a split section at the start of the
+    # next chunk, to keep context at boundaries (≈16% of a chunk)
+    OVERLAP_TOKENS = 80
+    # Rows tokenized per batched tokenizer call
+    _TOKENIZE_BATCH = 4096
+    # Docling chunks serialized and tokenized together
+    _DOCLING_BATCH = 256
 
     def __init__(self):
         self.chunker = HybridChunker(
             tokenizer=settings.CHUNK_TOKENIZER,
-            max_tokens=512,
+            max_tokens=self.MAX_TOKENS,
             merge_peers=True,
         )
 
@@ -84,17 +222,42 @@ class ChunkingService:
         document_id: str,
         index: int,
         extra_meta: dict | None = None,
-    ) -> dict:
-        meta = {
-            "document_id": document_id,
-            "file_name": file_name,
-            "chunk_index": index,
-            "char_count": len(content),
-            "token_count": 0,
-        }
-        if extra_meta:
-            meta.update(extra_meta)
-        return {"id": str(uuid.uuid4()), "content": content, "metadata": meta}
+        token_count: int = 0,
+    ) -> Chunk:
+        return Chunk(
+            content=content,
+            document=_document_info(document_id, file_name),
+            index=index,
+            token_count=token_count,
+            extra=extra_meta or None,
+        )
+
+    def _count_tokens_batch(self, texts: List[str]) -> List[int]:
+        """Token counts for many texts using one batched tokenizer call per slice."""
+        tokenizer = self.chunker.tokenizer.get_tokenizer()
+        counts: List[int] = []
+        for i in range(0, len(texts), self._TOKENIZE_BATCH):
+            encoded = tokenizer(texts[i : i + self._TOKENIZE_BATCH], add_special_tokens=False)
+            counts.extend(len(ids) for ids in encoded["input_ids"])
+        return counts
+
+    def _assign_ids(self, chunks: Iterable[Chunk], document_id: str) -> Iterator[Chunk]:
+        """Give every chunk an id derived from its document and content.
+
+        Identical content within one document is disambiguated by occurrence
+        number, so ids stay stable when unrelated parts of the file change.
+        Lazy, so streamed chunks get their ids as they are produced.
+        """
+        seen: dict[str, int] = {}
+        for chunk in chunks:
+            chunk.digest = hashlib.sha256(chunk.content.encode("utf-8")).digest()
+            content_hash = chunk.digest.hex()
+            occurrence = seen.get(content_hash, 0)
+            seen[content_hash] = occurrence + 1
+            chunk.id = str(
+                uuid.uuid5(_ID_NAMESPACE, f"{document_id}:{content_hash}:{occurrence}")
+            )
+            yield chunk
 
     def _simple_split(
         self,
@@ -103,152 +266,362 @@ class ChunkingService:
         document_id: str,
         start_index: int = 0,
         extra_meta: dict | None = None,
-    ) -> List[dict]:
-        """Character-based splitter with overlap. Used as fallback."""
-        stride = self.CHUNK_SIZE - self.OVERLAP
-        chunks = []
-        for i in range(0, len(text), stride):
-            piece = text[i : i + self.CHUNK_SIZE]
-            if not piece.strip():
-                continue
-            chunks.append(
-                self._make_chunk(piece, file_name, document_id, start_index + len(chunks), extra_meta)
+    ) -> Iterator[Chunk]:
+        """Token-budgeted splitter with overlap, for text too long for one chunk.
+
+        Breaks between lines where possible, else between sentences, and only
+        cuts inside a sentence that is over the budget by itself.
+        """
+        index = itertools.count(start_index)
+        window: List[tuple[str, int]] = []
+        used = 0
+
+        def make() -> Optional[Chunk]:
+            # Keep the first line's indentation (code)
+            content = "".join(piece for piece, _ in window).lstrip("\r\n").rstrip()
+            if not content:
+                return None
+            return self._make_chunk(
+                content, file_name, document_id, next(index),
+                extra_meta, used,
             )
-        return chunks
+
+        for piece, tokens in self._split_units(text):
+            if window and used + tokens > self.MAX_TOKENS:
+                if chunk := make():
+                    yield chunk
+                # Carry the tail of the chunk over as overlap, as long as the
+                # next piece still fits
+                carried = 0
+                keep = len(window)
+                while keep > 0 and carried + window[keep - 1][1] <= min(
+                    self.OVERLAP_TOKENS, self.MAX_TOKENS - tokens
+                ):
+                    keep -= 1
+                    carried += window[keep][1]
+                window, used = window[keep:], carried
+            window.append((piece, tokens))
+            used += tokens
+        if window and (chunk := make()):
+            yield chunk
+
+    def _split_units(self, text: str) -> List[tuple[str, int]]:
+        """Cut text into (piece, token count): lines, sentences of over-long
+        lines, and token-budget slices of over-long sentences. The pieces
+        concatenate back to the text."""
+        lines = text.splitlines(keepends=True)
+        units: List[tuple[str, int]] = []
+        for line, tokens in zip(lines, self._count_tokens_batch(lines)):
+            if tokens <= self.MAX_TOKENS:
+                units.append((line, tokens))
+                continue
+            bounds = [0, *(m.end() for m in _SENTENCE_END.finditer(line)), len(line)]
+            sentences = [line[a:b] for a, b in zip(bounds, bounds[1:]) if a < b]
+            for sentence, count in zip(sentences, self._count_tokens_batch(sentences)):
+                if count <= self.MAX_TOKENS:
+                    units.append((sentence, count))
+                else:
+                    units.extend(self._hard_split(sentence))
+        return units
+
+    def _hard_split(self, text: str) -> List[tuple[str, int]]:
+        """(slice, token count) of at most MAX_TOKENS tokens, cut at token boundaries."""
+        tokenizer = self.chunker.tokenizer.get_tokenizer()
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        firsts = range(0, len(offsets), self.MAX_TOKENS)
+        starts = [0, *(offsets[i][0] for i in firsts[1:])]
+        return [
+            (text[a:b], min(self.MAX_TOKENS, len(offsets) - first))
+            for a, b, first in zip(starts, [*starts[1:], len(text)], firsts)
+        ]
+
+    def _chunk_sections(
+        self,
+        sections: Iterable[str],
+        file_name: str,
+        document_id: str,
+        extra_meta: dict | None = None,
+    ) -> Iterator[Chunk]:
+        """One chunk per section that fits the token budget; longer ones are split."""
+        index = 0
+        stripped = (section.strip() for section in sections)
+        for block in itertools.batched(filter(None, stripped), self._TOKENIZE_BATCH):
+            for section, tokens in zip(block, self._count_tokens_batch(list(block))):
+                if tokens <= self.MAX_TOKENS:
+                    yield self._make_chunk(
+                        section, file_name, document_id, index,
+                        extra_meta, tokens,
+                    )
+                    index += 1
+                    continue
+                for chunk in self._simple_split(section, file_name, document_id, index, extra_meta):
+                    yield chunk
+                    index += 1
 
     # ── Format-specific text extractors ──────────────────────────────────────
 
-    def process_csv(self, file_content: bytes) -> str:
-        try:
-            df = pd.read_csv(io.BytesIO(file_content)).fillna("")
-            rows = []
-            for _, row in df.iterrows():
-                parts = [f"{col}: {val}" for col, val in row.items() if str(val) != ""]
-                if parts:
-                    rows.append(", ".join(parts))
-            return "\n".join(rows)
-        except Exception as e:
-            print(f"CSV parse error: {e}")
-            return file_content.decode("utf-8", errors="ignore")
+    @staticmethod
+    def _source(file_content: bytes | Path):
+        """pandas-readable handle: paths are read from disk, bytes from memory."""
+        return io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content
 
-    def process_xlsx(self, file_content: bytes) -> str:
-        try:
-            sheets: dict = pd.read_excel(io.BytesIO(file_content), sheet_name=None)
-            lines = []
-            for sheet_name, df in sheets.items():
-                df = df.fillna("")
-                lines.append(f"[Sheet: {sheet_name}]")
-                for _, row in df.iterrows():
-                    parts = [f"{col}: {val}" for col, val in row.items() if str(val) != ""]
-                    if parts:
-                        lines.append(", ".join(parts))
-            return "\n".join(lines)
-        except Exception as e:
-            print(f"XLSX parse error: {e}")
-            return ""
-
-    def process_json(self, file_content: bytes) -> str:
-        try:
-            data = json.loads(file_content.decode("utf-8"))
-            lines: list[str] = []
-            self._flatten_json(data, "", lines)
-            return "\n".join(lines)
-        except Exception:
+    @staticmethod
+    def read_text(file_content: bytes | Path) -> str:
+        """Decode an upload to text with a single full-size copy."""
+        if isinstance(file_content, bytes):
             return file_content.decode("utf-8", errors="ignore")
+        return Path(file_content).read_text(encoding="utf-8", errors="ignore")
+
+    @staticmethod
+    def _row_texts(df: pd.DataFrame) -> List[str]:
+        """One "col: val, col: val" line per row, skipping empty cells.
+
+        Built with whole-column string conversions instead of ``iterrows()``,
+        but produces exactly what iterating the rows would: all-numeric frames
+        are upcast to their common dtype first (an int next to a float column
+        prints as "1.0"), and floats print like Python floats.
+        """
+        if df.empty:
+            return []
+        common = df.iloc[:0].to_numpy().dtype
+        if common != object:
+            df = df.astype(common)
+
+        cells = []
+        for i, col in enumerate(df.columns):
+            values = df.iloc[:, i]
+            if values.dtype.kind == "f":
+                text = values.astype(np.float64).astype(str)
+            elif values.dtype.kind in "biu":
+                text = values.astype(str)
+            else:
+                # Timestamps, mixed objects, … — str() of each element
+                text = values.map(str)
+            text = text.to_numpy(dtype=object)
+            cells.append(np.where(text != "", f"{col}: " + text, ""))
+
+        return [", ".join(filter(None, row)) for row in zip(*cells)]
 
-    def _flatten_json(self, obj: Any, prefix: str, lines: list[str]):
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                self._flatten_json(v, f"{prefix}.{k}" if prefix else str(k), lines)
-        elif isinstance(obj, list):
-            for i, v in enumerate(obj):
-                self._flatten_json(v, f"{prefix}[{i}]", lines)
+    def load_table(self, file_content: bytes | Path, file_type: str) -> List[TableSheet]:
+        """Parse a CSV ('csv') or every sheet of a workbook ('xlsx') for chunk_table()."""
+        if file_type == "csv":
+            frames = {None: pd.read_csv(self._source(file_content))}
         else:
-            lines.append(f"{prefix}: {obj}")
+            frames = pd.read_excel(self._source(file_content), sheet_name=None)
+        return [
+            TableSheet(
+                name=name,
+                columns=[str(col) for col in df.columns],
+                rows=self._row_texts(df.fillna("")),
+            )
+            for name, df in frames.items()
+        ]
+
+    def stream_xlsx(self, path: Path) -> Iterator[TableSheet]:
+        """Read a workbook sheet by sheet and row by row (openpyxl read-only mode).
+
+        Memory stays flat however large the workbook is. Each sheet's rows are
+        a generator that must be consumed before moving to the next sheet.
+        Unlike load_table(), cells are printed as stored — there is no pandas
+        dtype inference across a column (an integer stays "3", not "3.0").
+        """
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    continue
+                # Same naming pandas uses for blank header cells
+                columns = [
+                    str(col) if col is not None else f"Unnamed: {i}"
+                    for i, col in enumerate(header)
+                ]
+                yield TableSheet(
+                    name=sheet.title,
+                    columns=columns,
+                    rows=(
+                        ", ".join(
+                            f"{col}: {val}"
+                            for col, val in zip(columns, row)
+                            if val is not None and str(val) != ""
+                        )
+                        for row in rows
+                    ),
+                )
+        finally:
+            workbook.close()
+
+    def load_json(self, file_content: bytes | Path) -> List[Leaf]:
+        """Parse a JSON document in memory into (parent, path, value) leaves for chunk_json()."""
+        raw = file_content if isinstance(file_content, bytes) else Path(file_content).read_bytes()
+        return list(flatten_json(json.loads(raw)))
+
+    @staticmethod
+    def stream_json(path: Path) -> Iterator[Leaf]:
+        """Parse a JSON file incrementally (see json_stream.iter_json_leaves()).
+
+        Memory depends on nesting depth, not file size. Malformed input
+        raises ValueError while the leaves are being consumed.
+        """
+        with open(path, encoding="utf-8-sig", errors="ignore") as stream:
+            yield from iter_json_leaves(stream)
+
+    def check_json(self, path: Path):
+        """Parse a JSON file once, keeping nothing; raises ValueError if it is malformed."""
+        collections.deque(self.stream_json(path), maxlen=0)
 
     # ── Source-code chunker ───────────────────────────────────────────────────
 
-    def chunk_source_code(self, text: str, file_name: str, document_id: str) -> List[dict]:
+    def chunk_source_code(self, text: str, file_name: str, document_id: str) -> Iterator[Chunk]:
         ext = Path(file_name).suffix.lower()
         language = _EXT_LANGUAGE.get(ext, "text")
         pattern = _SPLIT_PATTERN.get(language)
 
         # Split on definition boundaries; fall back to whole-text
         if pattern:
-            # Use lookahead so the delimiter stays with the following block
-            segments = re.split(rf"(?m)(?={pattern})", text)
+            # Cut before each match so the delimiter stays with the following
+            # block (re.split would also emit the pattern's captured groups)
+            starts = [0, *(m.start() for m in re.finditer(rf"(?m){pattern}", text))]
+            segments = (text[a:b] for a, b in zip(starts, [*starts[1:], len(text)]))
         else:
             segments = [text]
 
-        chunks: List[dict] = []
-        for seg in segments:
-            seg = seg.strip()
-            if not seg:
-                continue
-            extra = {"language": language}
-            if len(seg) > self.CHUNK_SIZE:
-                chunks.extend(
-                    self._simple_split(seg, file_name, document_id, len(chunks), extra)
-                )
-            else:
-                chunks.append(self._make_chunk(seg, file_name, document_id, len(chunks), extra))
-        return chunks
+        return self._chunk_sections(segments, file_name, document_id, {"language": language})
+
+    # ── Tabular chunker (row windows) ─────────────────────────────────────────
+
+    def chunk_table(self, sheets: Iterable[TableSheet], file_name: str, document_id: str) -> Iterator[Chunk]:
+        """Chunks of whole rows that fit the token budget.
+
+        Every chunk repeats its sheet name and column header so it can be
+        understood on its own, and records which data rows (1-based) it holds.
+        A single row larger than the budget becomes a chunk by itself.
+        Rows are consumed lazily, a tokenizer batch at a time.
+        """
+        index = itertools.count()
+        for sheet in sheets:
+            header = f"Columns: {', '.join(sheet.columns)}"
+            if sheet.name is not None:
+                header = f"[Sheet: {sheet.name}]\n{header}"
+            header_tokens = self._count_tokens_batch([header])[0]
+            budget = self.MAX_TOKENS - header_tokens
+            extra = {"sheet": sheet.name} if sheet.name is not None else {}
+
+            def make(window: List[tuple[int, str]], tokens: int) -> Chunk:
+                content = "\n".join([header, *(row for _, row in window)])
+                return self._make_chunk(content, file_name, document_id, next(index), {
+                    **extra,
+                    "row_start": window[0][0],
+                    "row_end": window[-1][0],
+                }, header_tokens + tokens)
+
+            numbered = ((n, row) for n, row in enumerate(sheet.rows, start=1) if row)
+            window: List[tuple[int, str]] = []
+            used = 0
+            for block in itertools.batched(numbered, self._TOKENIZE_BATCH):
+                counts = self._count_tokens_batch([row for _, row in block])
+                for item, tokens in zip(block, counts):
+                    if window and used + tokens > budget:
+                        yield make(window, used)
+                        window, used = [], 0
+                    window.append(item)
+                    used += tokens
+            if window:
+                yield make(window, used)
+
+    # ── JSON chunker (path-prefix groups) ─────────────────────────────────────
+
+    def chunk_json(self, leaves: Iterable[Leaf], file_name: str, document_id: str) -> Iterator[Chunk]:
+        """Chunks of "path: value" lines that fit the token budget.
+
+        A chunk is filled until the next line would overflow it, then cut
+        back to the shallowest change of parent path in its second half (the
+        latest of equally shallow ones); the lines after the cut start the
+        next chunk. Siblings such as the fields of one record stay together
+        and boundaries follow the document structure. Each chunk records the
+        longest JSON path shared by all of its lines. A single line larger
+        than the budget is split on its own. Leaves are consumed lazily.
+        """
+        index = 0
+        window: List[str] = []
+        paths: List[str] = []
+        counts: List[int] = []
+        used = 0
+        # (position in window, depth) where the parent path changes
+        cuts: List[tuple[int, int]] = []
+        parent = None
+
+        def make(end: int) -> Chunk:
+            return self._make_chunk(
+                "\n".join(window[:end]), file_name, document_id, index,
+                {"json_path": _common_json_path(paths[:end])}, sum(counts[:end]),
+            )
+
+        def cut_point() -> int:
+            """Where to close the current window: its best structural boundary, else its end."""
+            best, best_depth = len(window), None
+            heads = list(itertools.accumulate(counts))
+            for position, depth in cuts:
+                if heads[position - 1] * 2 >= self.MAX_TOKENS and (best_depth is None or depth <= best_depth):
+                    best, best_depth = position, depth
+            return best
+
+        for block in itertools.batched(leaves, self._TOKENIZE_BATCH):
+            lines = [_json_line(path, value) for _, path, value in block]
+            line_counts = self._count_tokens_batch(lines)
+            for (leaf_parent, path, _), line, tokens in zip(block, lines, line_counts):
+                if window and leaf_parent != parent:
+                    cuts.append((len(window), _json_depth(_common_json_path([parent, leaf_parent]))))
+                parent = leaf_parent
+                if tokens > self.MAX_TOKENS:
+                    if window:
+                        yield make(len(window))
+                        index += 1
+                        window, paths, counts, cuts, used = [], [], [], [], 0
+                    for chunk in self._simple_split(line, file_name, document_id, index, {"json_path": path}):
+                        yield chunk
+                        index += 1
+                    continue
+                while window and used + tokens > self.MAX_TOKENS:
+                    end = cut_point()
+                    yield make(end)
+                    index += 1
+                    window, paths, counts = window[end:], paths[end:], counts[end:]
+                    cuts = [(position - end, depth) for position, depth in cuts if position > end]
+                    used = sum(counts)
+                window.append(line)
+                paths.append(path)
+                counts.append(tokens)
+                used += tokens
+        if window:
+            yield make(len(window))
 
     # ── Markdown / plain-text chunker (heading-aware) ────────────────────────
 
-    def _chunk_headings(self, text: str, file_name: str, document_id: str) -> List[dict]:
+    def _chunk_headings(self, text: str, file_name: str, document_id: str) -> Iterator[Chunk]:
         # Split on Markdown headings (# / ## / ###…)
         sections = re.split(r"(?m)^(?=#{1,6} )", text)
-        chunks: List[dict] = []
-        for section in sections:
-            section = section.strip()
-            if not section:
-                continue
-            if len(section) <= self.CHUNK_SIZE:
-                chunks.append(self._make_chunk(section, file_name, document_id, len(chunks)))
-            else:
-                chunks.extend(
-                    self._simple_split(section, file_name, document_id, len(chunks))
-                )
-        return chunks
+        return self._chunk_sections(sections, file_name, document_id)
 
     # ── Docling-document chunker ──────────────────────────────────────────────
 
-    def _chunk_docling(self, doc, file_name: str, document_id: str) -> List[dict]:
-        raw_chunks = self.chunker.chunk(doc)
-        result: List[dict] = []
-        for i, chunk in enumerate(raw_chunks):
-            text = (
-                self.chunker.serialize(chunk)
-                if hasattr(self.chunker, "serialize")
-                else str(chunk)
-            )
-            token_count = self.chunker.tokenizer.count_tokens(text)
-
-            meta: dict = {
-                "document_id": document_id,
-                "file_name": file_name,
-                "chunk_index": i,
-                "char_count": len(text),
-                "token_count": token_count,
-            }
-
-            # Enrich with Docling structural info where available
-            if hasattr(chunk, "meta") and chunk.meta:
-                cm = chunk.meta
-                if hasattr(cm, "headings") and cm.headings:
-                    meta["section_title"] = cm.headings[-1]
-                if hasattr(cm, "doc_items") and cm.doc_items:
-                    item = cm.doc_items[0]
-                    if hasattr(item, "label"):
-                        meta["element_type"] = str(item.label)
-                    if hasattr(item, "prov") and item.prov:
-                        prov = item.prov[0]
-                        if hasattr(prov, "page_no"):
-                            meta["page_number"] = prov.page_no
-
-            result.append({"id": str(uuid.uuid4()), "content": text, "metadata": meta})
-        return result
+    def _chunk_docling(self, doc, file_name: str, document_id: str) -> Iterator[Chunk]:
+        """Serialize HybridChunker output and count its tokens a batch at a time.
+
+        Batches are small enough that the first chunks reach the embedder
+        long before a large document is fully chunked.
+        """
+        serialize = getattr(self.chunker, "serialize", str)
+        index = itertools.count()
+        for block in itertools.batched(self.chunker.chunk(doc), self._DOCLING_BATCH):
+            texts = [serialize(chunk) for chunk in block]
+            for chunk, text, tokens in zip(block, texts, self._count_tokens_batch(texts)):
+                yield self._make_chunk(
+                    text, file_name, document_id, next(index), _docling_meta(chunk), tokens
+                )
 
     # ── Public API ────────────────────────────────────────────────────────────
 
@@ -258,19 +631,49 @@ class ChunkingService:
         file_name: str,
         document_id: str = "",
         file_type: str = "text",
-    ) -> List[dict]:
+    ) -> List[Chunk]:
         """
         Route to the correct chunking strategy based on file_type.
 
         file_type values (set by file_service):
           'docling' | 'csv' | 'xlsx' | 'json' | 'text' | 'code'
+
+        'csv' / 'xlsx' expect the sheets returned by load_table() or
+        stream_xlsx(); 'json' the leaves from load_json() or stream_json().
+
+        Chunk ids are deterministic: the same content in the same document
+        always maps to the same Qdrant point.
         """
+        return list(self.iter_chunks(input_data, file_name, document_id, file_type))
+
+    def iter_chunks(
+        self,
+        input_data: Any,
+        file_name: str,
+        document_id: str = "",
+        file_type: str = "text",
+    ) -> Iterator[Chunk]:
+        """Like split_content(), but chunks are produced lazily as the result
+        is iterated, so a document is never held as a whole list of chunks.
+        Streamed sources (stream_xlsx(), stream_json()) are also read lazily.
+        """
+        return self._assign_ids(self._split(input_data, file_name, document_id, file_type), document_id)
+
+    def _split(self, input_data: Any, file_name: str, document_id: str, file_type: str) -> Iterator[Chunk]:
         ext = Path(file_name).suffix.lower()
 
         # Docling rich document (PDF, DOCX, PPTX, images)
         if file_type == "docling" or isinstance(input_data, (DoclingDocument, dict)):
             return self._chunk_docling(input_data, file_name, document_id)
 
+        # Tables — windows of complete rows
+        if file_type in {"csv", "xlsx"}:
+            return self.chunk_table(input_data, file_name, document_id)
+
+        # JSON — path/value lines grouped by path prefix
+        if file_type == "json":
+            return self.chunk_json(input_data, file_name, document_id)
+
         # Source code
         if file_type == "code" or ext in _EXT_LANGUAGE:
             return self.chunk_source_code(str(input_data), file_name, document_id)
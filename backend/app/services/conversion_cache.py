@@ -0,0 +1,139 @@
+"""
+Content-addressed cache of Docling conversions.
+
+Entries are keyed by SHA-256 of the file bytes plus the converter options
+fingerprint and hold the serialized ``DoclingDocument``. Re-uploading a file,
+or re-ingesting everything after clearing the vector DB, then skips the
+expensive layout / OCR pass entirely. Total size on disk is bounded with
+least-recently-used eviction.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from docling_core.types.doc.document import DoclingDocument
+
+from app.core.config import settings
+
+_SUFFIX = ".json.gz"
+
+
+class ConversionCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key → size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        if self.enabled:
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(content_hash: str, options: str) -> str:
+        """Cache key from the SHA-256 (hex) of the file bytes and the converter options."""
+        return hashlib.sha256(f"{content_hash}\0{options}".encode("utf-8")).hexdigest()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> DoclingDocument | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            data = gzip.decompress(path.read_bytes())
+            doc = DoclingDocument.model_validate_json(data)
+            # Persist recency so LRU order survives restarts
+            os.utime(path)
+        except Exception as e:
+            print(f"Conversion cache: dropping unreadable entry {key[:12]}: {e}")
+            self._discard(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return doc
+
+    def put(self, key: str, doc: DoclingDocument):
+        if not self.enabled:
+            return
+        data = gzip.compress(doc.model_dump_json().encode("utf-8"), compresslevel=3)
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def _load_index(self):
+        """Rebuild the LRU index from disk, oldest access time first."""
+        if not self.directory.exists():
+            return
+        files = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            st = path.stat()
+            files.append((st.st_mtime, path.name[: -len(_SUFFIX)], st.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under the size limit. Caller holds the lock."""
+        while self._total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            self._path(key).unlink(missing_ok=True)
+
+    def _discard(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
+
+
+conversion_cache = ConversionCache(
+    directory=settings.DATA_DIR / "conversion_cache",
+    max_bytes=settings.INGEST.CONVERSION_CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,216 @@
+"""
+Process pool for Docling document conversion.
+
+Each worker process owns one pre-initialised ``DocumentConverter`` per
+conversion profile (e.g. "fast" without OCR / table structure, "accurate"),
+so models are loaded once per process instead of once per request. The parent
+supervises every conversion: a worker that exceeds the configured timeout or
+memory cap is killed and replaced, so one pathological PDF cannot starve the
+server.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from importlib import metadata
+from pathlib import Path
+
+from docling_core.types.doc.document import DoclingDocument
+
+from app.core.config import settings
+
+# How often the parent checks a running conversion for timeout / memory cap
+_POLL_INTERVAL = 0.5
+
+try:
+    _DOCLING_VERSION = metadata.version("docling")
+except metadata.PackageNotFoundError:
+    _DOCLING_VERSION = "unknown"
+
+
+def options_fingerprint(profile: str | None) -> str:
+    """Identifies a converter configuration.
+
+    Part of the conversion cache key, so upgrading Docling, switching profile
+    or editing a profile's options never serves stale output. ``profile`` is
+    None for formats the profiles do not configure.
+    """
+    options = json.dumps(settings.INGEST.CONVERSION_PROFILES.get(profile, {}), sort_keys=True)
+    return f"docling={_DOCLING_VERSION};profile={profile};options={options}"
+
+
+class ConversionError(Exception):
+    """Raised when a worker fails to convert a document."""
+
+
+class ConversionTimeout(ConversionError):
+    """Raised when a conversion exceeds its time budget and the worker is killed."""
+
+
+def _worker_main(conn, torch_threads: int, profiles: dict[str, dict]):
+    """Entry point of a conversion worker process."""
+    # Split cores between workers instead of letting every process grab all of them.
+    # Must happen before torch / onnxruntime are imported.
+    os.environ.setdefault("OMP_NUM_THREADS", str(torch_threads))
+
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    converters = {}
+    for name, options in profiles.items():
+        # Profiles only change the PDF pipeline; images, DOCX and PPTX keep
+        # Docling's defaults (images always need OCR to yield any text).
+        converters[name] = DocumentConverter(
+            format_options={
+                InputFormat.PDF: PdfFormatOption(pipeline_options=PdfPipelineOptions(**options)),
+            }
+        )
+        # Load the profile's models now rather than on the first job
+        converters[name].initialize_pipeline(InputFormat.PDF)
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        path, profile = message
+        try:
+            result = converters[profile].convert(path)
+            conn.send(("ok", result.document.export_to_dict()))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+def _rss_mb(pid: int) -> float:
+    """Resident set size of a process in MB (Linux only; 0 elsewhere)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class _Worker:
+    def __init__(self, ctx, torch_threads: int, profiles: dict[str, dict]):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(child_conn, torch_threads, profiles),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        """Block until the worker finished loading its models."""
+        if self.ready:
+            return
+        try:
+            status, _ = self.conn.recv()
+        except EOFError:
+            raise ConversionError("Conversion worker died during start-up")
+        self.ready = status == "ready"
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ConversionPool:
+    def __init__(self, size: int, timeout: float, max_memory_mb: int, profiles: dict[str, dict]):
+        self.size = size
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.profiles = profiles
+        self._ctx = mp.get_context("spawn")
+        self._torch_threads = max(1, (os.cpu_count() or 1) // size)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Spawn the worker processes (idempotent). Models load in the background."""
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = _Worker(self._ctx, self._torch_threads, self.profiles)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers.clear()
+            self._idle = queue.Queue()
+
+    def _replace(self, worker: _Worker):
+        """Kill a misbehaving worker and put a fresh one in its place."""
+        worker.kill()
+        fresh = _Worker(self._ctx, self._torch_threads, self.profiles)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self._workers.append(fresh)
+        self._idle.put(fresh)
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def convert(self, path: Path, profile: str, timeout: float | None = None) -> DoclingDocument:
+        """Convert a file in a worker process with the named profile's converter.
+
+        Blocks the calling thread until a worker is free and the conversion
+        finished. Raises ConversionTimeout / ConversionError on failure.
+        """
+        if profile not in self.profiles:
+            raise ConversionError(f"Unknown conversion profile '{profile}'")
+        self.start()
+        timeout = timeout or self.timeout
+        worker = self._idle.get()
+        try:
+            worker.wait_ready()
+            worker.conn.send((str(path), profile))
+            status, payload = self._await_result(worker, timeout)
+        except ConversionError:
+            self._replace(worker)
+            raise
+        except (EOFError, OSError) as e:
+            self._replace(worker)
+            raise ConversionError(f"Conversion worker crashed: {e}")
+
+        self._idle.put(worker)
+        if status == "error":
+            raise ConversionError(payload)
+        return DoclingDocument.model_validate(payload)
+
+    def _await_result(self, worker: _Worker, timeout: float) -> tuple[str, object]:
+        deadline = time.monotonic() + timeout
+        while not worker.conn.poll(_POLL_INTERVAL):
+            if time.monotonic() > deadline:
+                raise ConversionTimeout(f"Conversion exceeded {timeout:.0f}s and was aborted")
+            if self.max_memory_mb and _rss_mb(worker.process.pid) > self.max_memory_mb:
+                raise ConversionError(
+                    f"Conversion exceeded the {self.max_memory_mb} MB memory limit and was aborted"
+                )
+            if not worker.process.is_alive():
+                raise ConversionError("Conversion worker exited unexpectedly")
+        return worker.conn.recv()
+
+
+conversion_pool = ConversionPool(
+    size=settings.INGEST.conversion_workers,
+    timeout=settings.INGEST.CONVERSION_TIMEOUT,
+    max_memory_mb=settings.INGEST.CONVERSION_MAX_MEMORY_MB,
+    profiles=settings.INGEST.CONVERSION_PROFILES,
+)
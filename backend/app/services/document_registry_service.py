@@ -0,0 +1,71 @@
+from typing import Iterable, List, Optional
+from sqlmodel import Session, select, delete
+from app.models.document import IndexedDocument
+
+
+class DocumentRegistryService:
+    """Content hashes of indexed documents, so identical uploads can be skipped.
+
+    A hit only counts for the source it was registered from. A document with
+    a source path is re-ingested (and its old content dropped) whenever that
+    source is edited, so answering an upload from another source with it
+    would later lose that file's content. Uploads without a source path each
+    become their own document that is never replaced, so those dedupe
+    against one another.
+
+    A hit also needs the same conversion profile: re-uploading a PDF with
+    "accurate" after a poor "fast" conversion must convert it again.
+    """
+
+    @staticmethod
+    def matches(doc: IndexedDocument, source_path: Optional[str], profile: Optional[str]) -> bool:
+        return doc.source_path == source_path and doc.profile == profile
+
+    def find_indexed(
+        self, db: Session, content_hash: str, source_path: Optional[str], profile: Optional[str]
+    ) -> Optional[IndexedDocument]:
+        """The document holding this content for ``source_path`` and ``profile``, if any."""
+        docs = self.find_by_hashes(db, [content_hash]).get(content_hash, [])
+        return next((doc for doc in docs if self.matches(doc, source_path, profile)), None)
+
+    def find_by_hashes(self, db: Session, hashes: Iterable[str]) -> dict[str, List[IndexedDocument]]:
+        """Every registered document per content hash; check matches() before treating one as a hit."""
+        statement = select(IndexedDocument).where(IndexedDocument.content_hash.in_(list(hashes)))
+        found: dict[str, List[IndexedDocument]] = {}
+        for doc in db.exec(statement).all():
+            found.setdefault(doc.content_hash, []).append(doc)
+        return found
+
+    def register(
+        self,
+        db: Session,
+        content_hash: str,
+        document_id: str,
+        file_name: str,
+        size: int,
+        total_chunks: int,
+        source_path: Optional[str] = None,
+        profile: Optional[str] = None,
+    ):
+        """Record the current content of a document, replacing its previous version."""
+        db.merge(IndexedDocument(
+            content_hash=content_hash,
+            document_id=document_id,
+            file_name=file_name,
+            source_path=source_path,
+            profile=profile,
+            size=size,
+            total_chunks=total_chunks,
+        ))
+        db.commit()
+
+    def remove_document(self, db: Session, document_id: str):
+        db.exec(delete(IndexedDocument).where(IndexedDocument.document_id == document_id))
+        db.commit()
+
+    def clear(self, db: Session):
+        db.exec(delete(IndexedDocument))
+        db.commit()
+
+
+document_registry_service = DocumentRegistryService()
@@ -0,0 +1,189 @@
+"""
+Persistent cache of embedding vectors.
+
+Entries are keyed by SHA-256 of the embedding model, the kind of embedding
+("document" or "query", which use different prompts) and the whitespace-
+normalized text, and hold the float32 vector. Re-ingesting content that was
+embedded before (after clearing or rebuilding the vector DB, or the same
+passage in another document) then skips the model. Stored in one SQLite file
+so it survives restarts; its size is bounded with least-recently-used
+eviction.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+KINDS = ("document", "query")
+
+# Keys per SELECT … IN (…), below SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+
+
+def normalize(text: str) -> str:
+    """NFC with whitespace runs collapsed. The tokenizer splits on whitespace
+    anyway, so texts that differ only in spacing share an entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def _rate(hits: int, misses: int) -> float:
+    return round(hits / (hits + misses), 3) if hits + misses else 0.0
+
+
+class EmbeddingCache:
+    def __init__(self, path: Path, model_name: str, max_bytes: int):
+        self.path = path
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.hits = dict.fromkeys(KINDS, 0)
+        self.misses = dict.fromkeys(KINDS, 0)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._entries = 0
+        self._total_bytes = 0
+        # Logical clock for LRU order; persisted in the ``used`` column
+        self._clock = 0
+        if max_bytes > 0:
+            self._open()
+
+    @property
+    def enabled(self) -> bool:
+        return self._db is not None
+
+    def key(self, text: str, kind: str) -> bytes:
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{normalize(text)}".encode("utf-8")).digest()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get_many(self, texts: Sequence[str], kind: str) -> List[Optional[np.ndarray]]:
+        """Cached vector per text, None where there is none."""
+        if not self.enabled:
+            return [None] * len(texts)
+        keys = [self.key(text, kind) for text in texts]
+        unique = list(set(keys))
+        found: dict[bytes, bytes] = {}
+        with self._lock:
+            try:
+                for start in range(0, len(unique), _LOOKUP_BATCH):
+                    batch = unique[start: start + _LOOKUP_BATCH]
+                    found.update(self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch,
+                    ))
+                if found:
+                    self._clock += 1
+                    with self._db:
+                        self._db.executemany(
+                            "UPDATE embeddings SET used = ? WHERE key = ?",
+                            [(self._clock, key) for key in found],
+                        )
+            except sqlite3.Error as e:
+                print(f"Embedding cache lookup failed: {e}")
+            hits = sum(key in found for key in keys)
+            self.hits[kind] += hits
+            self.misses[kind] += len(keys) - hits
+        return [np.frombuffer(found[key], dtype=np.float32) if key in found else None for key in keys]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence, kind: str):
+        if not self.enabled or not texts:
+            return
+        rows = [
+            (self.key(text, kind), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._clock += 1
+            try:
+                with self._db:
+                    inserted = self._db.executemany(
+                        "INSERT OR IGNORE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                        [(key, vector, self._clock) for key, vector in rows],
+                    ).rowcount
+                self._entries += inserted
+                self._total_bytes += inserted * (len(rows[0][0]) + len(rows[0][1]))
+                self._evict()
+            except sqlite3.Error as e:
+                # The vectors are still used; they just are not cached
+                print(f"Embedding cache write failed: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "enabled": self.enabled,
+                "model": self.model_name,
+                "entries": self._entries,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": hits,
+                "misses": misses,
+                "evictions": self.evictions,
+                "hit_rate": _rate(hits, misses),
+                "by_kind": {
+                    kind: {
+                        "hits": self.hits[kind],
+                        "misses": self.misses[kind],
+                        "hit_rate": _rate(self.hits[kind], self.misses[kind]),
+                    }
+                    for kind in KINDS
+                },
+            }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _open(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key BLOB PRIMARY KEY, vector BLOB NOT NULL, used INTEGER NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            db.commit()
+        except sqlite3.Error as e:
+            # Embedding still works, only without the cache
+            print(f"Embedding cache disabled, cannot open {self.path}: {e}")
+            return
+        self._db = db
+        self._clock = db.execute("SELECT COALESCE(MAX(used), 0) FROM embeddings").fetchone()[0]
+        self._recount()
+        self._evict()
+
+    def _recount(self):
+        self._entries, self._total_bytes = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(key) + LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()
+
+    def _evict(self):
+        """Drop least-recently-used entries down to 90% of the limit. Caller holds the lock."""
+        if self._total_bytes <= self.max_bytes or not self._entries:
+            return
+        entry_bytes = self._total_bytes / self._entries
+        count = int((self._total_bytes - self.max_bytes * 0.9) / entry_bytes) + 1
+        with self._db:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                (count,),
+            )
+        before = self._entries
+        self._recount()
+        self.evictions += before - self._entries
+
+
+embedding_cache = EmbeddingCache(
+    path=settings.DATA_DIR / "embedding_cache.sqlite3",
+    model_name=settings.EMBED_MODEL,
+    max_bytes=settings.EMBEDDING.CACHE_MAX_MB * 1024 * 1024,
+)
@@ -0,0 +1,99 @@
+"""
+Process pool for document embedding.
+
+fastembed runs one ONNX session per process, and one session spread over many
+cores scales poorly. On larger machines a few worker processes, each with its
+own copy of the model and an equal share of the cores, embed separate slices
+of a batch in parallel. Models are loaded once per worker, not once per call;
+fastembed's own ``parallel=`` option starts a fresh pool (and reloads the
+model) on every embed() call, which is too slow for batch-at-a-time ingestion.
+"""
+
+import itertools
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List
+
+import numpy as np
+
+from app.core.config import settings
+
+# The worker process's model, loaded by _init_worker()
+_model = None
+
+
+def _init_worker(model_name: str, threads: int):
+    global _model
+    # Must happen before onnxruntime is imported
+    os.environ.setdefault("OMP_NUM_THREADS", str(threads))
+    from fastembed import TextEmbedding
+
+    _model = TextEmbedding(model_name=model_name, threads=threads)
+
+
+def _embed(texts: List[str], batch_size: int) -> np.ndarray:
+    return np.stack(list(_model.embed(texts, batch_size=batch_size)))
+
+
+class EmbeddingError(Exception):
+    """Raised when an embedding worker dies; the pool is rebuilt on next use."""
+
+
+class EmbeddingPool:
+    def __init__(self, model_name: str, size: int, batch_size: int):
+        self.model_name = model_name
+        self.size = size
+        self.batch_size = batch_size
+        self._threads = max(1, (os.cpu_count() or 1) // size)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> ProcessPoolExecutor:
+        """Create the pool (idempotent); workers spawn and load the model on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self._threads),
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                # Waits for the workers to exit so none is left orphaned
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed ``texts`` across the workers; rows are in input order."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        executor = self.start()
+        # One slice per worker (but at least one model batch) so all stay busy
+        step = max(self.batch_size, -(-len(texts) // self.size))
+        slices = [texts[i: i + step] for i in range(0, len(texts), step)]
+        try:
+            return np.concatenate(list(executor.map(_embed, slices, itertools.repeat(self.batch_size))))
+        except BrokenProcessPool as e:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise EmbeddingError(f"Embedding worker crashed: {e}")
+
+
+embedding_pool = EmbeddingPool(
+    model_name=settings.EMBED_MODEL,
+    size=settings.EMBEDDING.workers,
+    batch_size=settings.EMBEDDING.BATCH_SIZE,
+)
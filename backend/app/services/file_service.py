@@ -1,10 +1,18 @@
-import os
-import tempfile
-from pathlib import Path
-from docling.document_converter import DocumentConverter
+import hashlib
+import shutil
+import tarfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, Callable, Iterator, Optional
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 import uuid
 
+from app.core.config import settings
+from app.services.conversion_cache import conversion_cache
+from app.services.conversion_pool import conversion_pool, options_fingerprint
+
 # Extensions that Docling handles (returns DoclingDocument)
 _DOCLING_EXTENSIONS = {".pdf", ".docx", ".pptx", ".png", ".jpg", ".jpeg"}
 
@@ -47,72 +55,375 @@ _CODE_EXTENSIONS = {
 
 ALL_ALLOWED = _DOCLING_EXTENSIONS | _TEXT_EXTENSIONS | _TABULAR_EXTENSIONS | _CODE_EXTENSIONS
 
+# Archives accepted by the bulk endpoint; members are ingested individually
+_ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Read size when streaming an upload to disk
+_SPOOL_CHUNK = 1024 * 1024
+
+_MB = 1024 * 1024
+
+
+@dataclass
+class SpooledUpload:
+    """An upload streamed to a private file on disk, hashed on the way in."""
+    path: Path
+    size: int
+    sha256: str
+
+
+@dataclass
+class BulkEntry:
+    """One file of a bulk upload: either spooled and ready to ingest, or skipped."""
+    source: str                             # path inside the upload / archive
+    upload: Optional[SpooledUpload] = None
+    skipped: Optional[str] = None           # reason it is not ingested
+    has_path: bool = True                   # False → source is only the file name
+
+    @property
+    def file_name(self) -> str:
+        return PurePosixPath(self.source).name
+
+
+class BulkUpload:
+    """The files of one bulk request: loose spooled files, then archive members.
+
+    Iterating hands ownership of each spooled file to the consumer. ``close()``
+    deletes whatever was not handed out yet, so an aborted job leaves nothing
+    behind in the spool.
+    """
+
+    def __init__(self, entries: list[BulkEntry], archives: list[BulkEntry]):
+        self.entries = entries
+        self.archives = archives
+        self._handed_out = 0
+        self._members: Optional[Iterator[BulkEntry]] = None
+
+    def __iter__(self) -> Iterator[BulkEntry]:
+        for entry in self.entries[self._handed_out:]:
+            self._handed_out += 1
+            yield entry
+        for archive in self.archives:
+            self._members = file_service.iter_archive(archive)
+            yield from self._members
+
+    def close(self):
+        if self._members is not None:
+            self._members.close()
+        for entry in self.entries[self._handed_out:]:
+            if entry.upload:
+                entry.upload.path.unlink(missing_ok=True)
+        self._handed_out = len(self.entries)
+        for archive in self.archives:
+            archive.upload.path.unlink(missing_ok=True)
+
+
+def _member_path(name: str) -> str | None:
+    """Normalised relative path of an archive member; None for unsafe names."""
+    parts = [p for p in PurePosixPath(name.replace("\\", "/")).parts if p not in ("", ".", "/")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+
+def _hash_and_write(digest, out: BinaryIO, piece: bytes):
+    digest.update(piece)
+    out.write(piece)
+
+
+def _is_junk(path: str) -> bool:
+    """OS metadata that archivers add next to real files (macOS resource forks etc.)."""
+    parts = path.split("/")
+    return "__MACOSX" in parts or parts[-1].startswith("._") or parts[-1] in {".DS_Store", "Thumbs.db"}
+
 
 class FileService:
     def __init__(self):
-        self.converter = DocumentConverter()
-        self.max_file_size = 20 * 1024 * 1024  # 20 MB
+        self.max_file_size = settings.INGEST.MAX_UPLOAD_MB * 1024 * 1024
+        self.max_resumable_size = settings.INGEST.MAX_RESUMABLE_UPLOAD_MB * 1024 * 1024
+        # One-shot uploads waiting for (or being processed by) an ingestion job
+        self.spool_dir = settings.DATA_DIR / "spool"
+
+    def unsupported_reason(
+        self, file_name: str, size: int, max_size: int | None = None
+    ) -> tuple[int, str] | None:
+        """Return (HTTP status, reason) if a file cannot be ingested, else None.
+
+        ``max_size`` defaults to the single-request upload limit.
+        """
+        max_size = max_size or self.max_file_size
+        if size > max_size:
+            return 403, f"File too large (max {max_size // (1024 * 1024)} MB)"
+
+        ext = Path(file_name).suffix.lower()
+        # Allow files named 'Dockerfile' (no extension)
+        if file_name.lower() == "dockerfile":
+            return None
+        if ext not in ALL_ALLOWED:
+            return (
+                415,
+                f"Extension '{ext}' is not supported. "
+                f"Supported: documents, images, spreadsheets, and source code.",
+            )
+        return None
 
     async def validate_file(self, file: UploadFile):
         """Ensure file size and extension are acceptable."""
-        size = file.size if file.size else 0
-        if size > self.max_file_size:
-            raise HTTPException(status_code=403, detail="File too large (max 20 MB)")
+        problem = self.unsupported_reason(file.filename, file.size or 0)
+        if problem:
+            status_code, detail = problem
+            raise HTTPException(status_code=status_code, detail=detail)
+
+    @staticmethod
+    def is_archive(file_name: str) -> bool:
+        return file_name.lower().endswith(_ARCHIVE_SUFFIXES)
 
+    async def spool_upload(self, file: UploadFile, max_size: int | None = None) -> SpooledUpload:
+        """Stream an upload to disk in fixed-size pieces, hashing as it goes.
+
+        Memory stays constant regardless of file size; the size limit
+        (``max_size``, default the single-request limit) is enforced on the
+        bytes actually received, not the declared size. Hashing and writing
+        run in the threadpool so large uploads do not stall the event loop.
+        """
+        max_size = max_size or self.max_file_size
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
         ext = Path(file.filename).suffix.lower()
-        # Allow files named 'Dockerfile' (no extension)
-        if file.filename.lower() == "dockerfile":
+        path = self.spool_dir / f"docrag_{uuid.uuid4()}{ext}"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with path.open("wb") as out:
+                while piece := await file.read(_SPOOL_CHUNK):
+                    size += len(piece)
+                    if size > max_size:
+                        raise HTTPException(
+                            status_code=403,
+                            detail=f"File too large (max {max_size // _MB} MB)",
+                        )
+                    await run_in_threadpool(_hash_and_write, digest, out, piece)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+
+    def iter_archive(self, archive: BulkEntry) -> Iterator[BulkEntry]:
+        """Stream the members of a zip / tar archive into the spool one at a time.
+
+        ``archive`` is the spooled archive with its own source. Members are
+        reported as ``<archive source>/<member path>`` and only identify a
+        document when the archive itself does (``has_path``): a path like
+        README.md inside some archive is no more unique than a bare file name.
+
+        Takes ownership of the archive and deletes it once exhausted or closed.
+        Nothing is ever written to a member's own path, so names like
+        ``../../etc/passwd`` cannot escape the spool; they are skipped anyway,
+        as are links, devices and OS metadata files. The member count and the
+        total extracted size are capped (BULK_MAX_FILES / BULK_MAX_EXTRACTED_MB),
+        counting bytes actually decompressed rather than the sizes the archive
+        claims.
+        """
+        budget = settings.INGEST.BULK_MAX_EXTRACTED_MB * _MB
+        count = 0
+
+        def entry(member: str, **details) -> BulkEntry:
+            return BulkEntry(source=f"{archive.source}/{member}", has_path=archive.has_path, **details)
+
+        try:
+            for name, declared, opener in self._archive_members(archive.upload.path):
+                member = _member_path(name)
+                if member is None:
+                    yield entry(name, skipped="Unsafe path in archive")
+                    continue
+                if _is_junk(member):
+                    continue
+                count += 1
+                if count > settings.INGEST.BULK_MAX_FILES:
+                    yield entry(
+                        member,
+                        skipped=f"Archive member limit reached ({settings.INGEST.BULK_MAX_FILES} files)",
+                    )
+                    return
+                if opener is None:
+                    yield entry(member, skipped="Not a regular file")
+                    continue
+                # Checked by base name so extension-less types (Dockerfile) match
+                problem = self.unsupported_reason(
+                    PurePosixPath(member).name, declared, max_size=self.max_resumable_size
+                )
+                if problem:
+                    yield entry(member, skipped=problem[1])
+                    continue
+                limit = min(self.max_resumable_size, budget)
+                with opener() as stream:
+                    upload = self._spool_stream(stream, member, limit)
+                if upload is None:
+                    yield entry(member, skipped="Exceeds the extraction size limit")
+                    if limit == budget:
+                        return
+                    continue
+                budget -= upload.size
+                yield entry(member, upload=upload)
+        finally:
+            archive.upload.path.unlink(missing_ok=True)
+
+    def _archive_members(
+        self, archive: Path
+    ) -> Iterator[tuple[str, int, Optional[Callable[[], BinaryIO]]]]:
+        """Yield (name, declared size, opener) per file member; opener is None for non-regular files."""
+        if zipfile.is_zipfile(archive):
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    # Unix mode lives in the high 16 bits; 0o120000 marks a symlink
+                    is_link = (info.external_attr >> 16) & 0o170000 == 0o120000
+                    yield info.filename, info.file_size, None if is_link else (lambda i=info: zf.open(i))
             return
-        if ext not in ALL_ALLOWED:
+        try:
+            tf = tarfile.open(archive, mode="r:*")
+        except tarfile.TarError:
+            raise HTTPException(status_code=415, detail="Unreadable archive (expected zip or tar)")
+        with tf:
+            for member in tf:
+                if member.isdir():
+                    continue
+                opener = (lambda m=member: tf.extractfile(m)) if member.isfile() else None
+                yield member.name, member.size, opener
+
+    def _spool_stream(self, stream: BinaryIO, file_name: str, max_size: int) -> SpooledUpload | None:
+        """Synchronous counterpart of spool_upload(); None when ``max_size`` is exceeded."""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"docrag_{uuid.uuid4()}{Path(file_name).suffix.lower()}"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with path.open("wb") as out:
+                while piece := stream.read(_SPOOL_CHUNK):
+                    size += len(piece)
+                    if size > max_size:
+                        path.unlink(missing_ok=True)
+                        return None
+                    digest.update(piece)
+                    out.write(piece)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return SpooledUpload(path=path, size=size, sha256=digest.hexdigest())
+
+    def purge_spool(self):
+        """Remove spooled uploads left behind by a previous process."""
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def adopt(self, path: Path, file_name: str) -> Path:
+        """Move a file assembled elsewhere (e.g. a resumable upload) into the spool."""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        target = self.spool_dir / f"docrag_{uuid.uuid4()}{Path(file_name).suffix.lower()}"
+        path.replace(target)
+        return target
+
+    @staticmethod
+    def check_profile(profile: str | None):
+        """Reject names that are not in the configured conversion profiles."""
+        if profile and profile not in settings.INGEST.CONVERSION_PROFILES:
             raise HTTPException(
-                status_code=415,
-                detail=f"Extension '{ext}' is not supported. "
-                       f"Supported: documents, images, spreadsheets, and source code.",
+                status_code=400,
+                detail=f"Unknown conversion profile '{profile}'. "
+                f"Available: {', '.join(settings.INGEST.CONVERSION_PROFILES)}",
             )
 
-    async def process_file(self, file: UploadFile) -> tuple[bytes | object, str]:
-        """
-        Convert an uploaded file to either:
-          - raw bytes  (text / tabular / source-code paths)
-          - DoclingDocument (PDF, DOCX, PPTX, images)
+    def conversion_profile(self, file_name: str, requested: str | None = None) -> str:
+        """Profile to convert a file with: the requested one, else the
+        per-extension default, else the global default."""
+        profile = (
+            requested
+            or settings.INGEST.CONVERSION_PROFILE_BY_EXTENSION.get(Path(file_name).suffix.lower())
+            or settings.INGEST.CONVERSION_PROFILE
+        )
+        self.check_profile(profile)
+        return profile
 
-        Returns (content, file_type) where file_type is one of:
-          'docling' | 'csv' | 'xlsx' | 'json' | 'text' | 'code'
+    def converted_with(self, file_name: str, requested: str | None = None) -> str | None:
+        """Profile that shapes a file's conversion, or None if none does.
+
+        Profiles only change the PDF pipeline: DOCX, PPTX and images convert
+        the same under any of them, and files outside Docling not at all.
         """
-        ext = Path(file.filename).suffix.lower()
-        content = await file.read()
+        if Path(file_name).suffix.lower() != ".pdf":
+            return None
+        return self.conversion_profile(file_name, requested)
+
+    @staticmethod
+    def file_type(file_name: str) -> str:
+        """How a file is parsed: 'csv' | 'xlsx' | 'json' | 'text' | 'code' | 'docling'."""
+        ext = Path(file_name).suffix.lower()
 
         # Tabular
         if ext == ".csv":
-            return content, "csv"
+            return "csv"
         if ext == ".xlsx":
-            return content, "xlsx"
+            return "xlsx"
 
         # JSON
         if ext == ".json":
-            return content, "json"
+            return "json"
 
         # Plain text / markup / PUML
         if ext in _TEXT_EXTENSIONS:
-            return content, "text"
+            return "text"
 
         # Source code
-        if ext in _CODE_EXTENSIONS or file.filename.lower() == "dockerfile":
-            return content, "code"
+        if ext in _CODE_EXTENSIONS or file_name.lower() == "dockerfile":
+            return "code"
+
+        # PDF, DOCX, PPTX, images
+        return "docling"
+
+    def process_file(
+        self, path: Path, file_name: str, content_hash: str, profile: str | None = None
+    ) -> tuple[Path | object, str]:
+        """
+        Prepare a spooled upload for chunking. Returns either:
+          - the file path  (text / tabular / source-code paths, read later by
+            the chunking service straight from disk)
+          - DoclingDocument (PDF, DOCX, PPTX, images)
+
+        Synchronous — the Docling path blocks until a conversion worker process
+        has finished, so call it from an ingestion worker, never directly
+        inside an async request handler.
+
+        ``profile`` selects the Docling conversion profile (see
+        conversion_profile()).
+
+        Returns (content, file_type) where file_type is one of:
+          'docling' | 'csv' | 'xlsx' | 'json' | 'text' | 'code'
+        """
+        file_type = self.file_type(file_name)
+        if file_type != "docling":
+            return path, file_type
+
+        # Docling path (PDF, DOCX, PPTX, images) — reuse a cached conversion if
+        # these exact bytes were already converted with the same options. Only
+        # a PDF's options depend on the profile.
+        cache_key = conversion_cache.key(
+            content_hash, options_fingerprint(self.converted_with(file_name, profile))
+        )
+        profile = self.conversion_profile(file_name, profile)
+        cached = conversion_cache.get(cache_key)
+        if cached is not None:
+            return cached, "docling"
 
-        # Docling path (PDF, DOCX, PPTX, images)
-        safe_name = f"docrag_{uuid.uuid4()}{ext}"
-        temp_path = Path(tempfile.gettempdir()) / safe_name
         try:
-            temp_path.write_bytes(content)
-            result = self.converter.convert(temp_path)
-            return result.document, "docling"
+            # Workers read the spooled file directly — no extra copy
+            document = conversion_pool.convert(path, profile)
         except Exception as e:
-            print(f"Docling conversion error for {file.filename}: {e}")
+            print(f"Docling conversion error for {file_name}: {e}")
             raise HTTPException(status_code=500, detail=f"Document conversion failed: {e}")
-        finally:
-            if temp_path.exists():
-                os.remove(temp_path)
 
+        try:
+            conversion_cache.put(cache_key, document)
+        except Exception as e:
+            print(f"Conversion cache write failed for {file_name}: {e}")
+        return document, "docling"
 
 file_service = FileService()
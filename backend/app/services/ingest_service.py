@@ -0,0 +1,823 @@
+"""
+Background ingestion jobs.
+
+Uploads are accepted immediately and processed by a bounded worker pool so
+that CPU-bound Docling conversion and embedding never run on the event loop.
+Each job walks through the stages parse → chunk → diff → embed → upsert and
+records how long every stage took. Document and chunk ids are deterministic,
+so re-ingesting a file only embeds chunks that are not already indexed.
+
+Bulk jobs (many files or an archive) run the same stages as a pipeline with
+the stages overlapping across files; see ``_BulkRun``.
+"""
+
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services.chunking_service import Chunk, chunking_service, document_id_for
+from app.services.document_registry_service import document_registry_service
+from app.services.file_service import BulkEntry, BulkUpload, SpooledUpload, file_service
+from app.services.json_stream import DuplicateKeyError
+from app.services.near_duplicates import NearDuplicateFilter
+from app.services.vector_service import vector_service
+
+# Share of overall progress attributed to parsing; the rest follows the
+# chunks indexed, since chunk → diff → embed → upsert run per batch
+_PARSE_WEIGHT = 0.3
+# Rough size of one chunk on disk, to estimate a new document's chunk count
+_BYTES_PER_CHUNK = 2048
+
+
+def _error_message(e: Exception) -> str:
+    return str(e.detail if isinstance(e, HTTPException) else e)
+
+
+@dataclass
+class IngestJob:
+    id: str
+    file_name: str
+    kind: str = "file"              # file | bulk
+    status: str = "queued"          # queued | running | completed | failed
+    stage: str = "queued"           # queued | parse | chunk | diff | embed | upsert | pipeline (bulk) | done
+    progress: float = 0.0           # 0.0 – 1.0 across all stages
+    chunks_done: int = 0            # chunks diffed, embedded and upserted so far
+    timings: Dict[str, float] = field(default_factory=dict)  # stage → seconds
+    document_id: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "file_name": self.file_name,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "chunks_done": self.chunks_done,
+            "timings": self.timings,
+            "document_id": self.document_id,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class _DocumentLocks:
+    """Lets one job at a time write a given document.
+
+    Ingesting a document diffs against its indexed chunks and deletes the
+    ones it did not see, so two concurrent jobs for the same document_id
+    would delete each other's chunks. A set of busy ids rather than a Lock
+    per document, so it stays bounded and a bulk run may release from
+    another thread than the one that acquired.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._busy: Set[str] = set()
+
+    def acquire(self, document_id: str):
+        with self._cond:
+            while document_id in self._busy:
+                self._cond.wait()
+            self._busy.add(document_id)
+
+    def release(self, document_id: str):
+        with self._cond:
+            self._busy.discard(document_id)
+            self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, document_id: str):
+        self.acquire(document_id)
+        try:
+            yield
+        finally:
+            self.release(document_id)
+
+
+class IngestService:
+    def __init__(self, max_workers: int, history: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._history = history
+        self._lock = threading.Lock()
+        self.documents = _DocumentLocks()
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def submit(
+        self,
+        path: Path,
+        file_name: str,
+        content_hash: str,
+        source: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> IngestJob:
+        """Queue a spooled upload for ingestion and return its job immediately.
+
+        The job takes ownership of ``path`` and deletes it when finished.
+        ``source`` (e.g. the file's path inside an uploaded folder) identifies
+        the document, so re-uploads update it in place. Without one the file
+        becomes a new document: bare file names such as README.md are far too
+        common to tell documents apart. ``content_hash`` is the
+        SHA-256 of the bytes, recorded in the document registry on success.
+        ``profile`` names the Docling conversion profile (default: by extension).
+        """
+        job = IngestJob(
+            id=str(uuid.uuid4()),
+            file_name=file_name,
+            document_id=document_id_for(source) if source else str(uuid.uuid4()),
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, path, content_hash, profile, source)
+        return job
+
+    def submit_bulk(self, label: str, upload: BulkUpload, profile: Optional[str] = None) -> IngestJob:
+        """Queue many files for pipelined ingestion as a single job.
+
+        Archives in ``upload`` are extracted lazily on the job's thread. The
+        job takes ownership of every spooled file. Its result is an aggregate
+        report with per-file outcomes and files/sec / chunks/sec throughput.
+        """
+        job = IngestJob(id=str(uuid.uuid4()), file_name=label, kind="bulk")
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run_bulk, job, upload, profile)
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _prune(self):
+        """Drop the oldest finished jobs once the history limit is exceeded."""
+        excess = len(self._jobs) - self._history
+        if excess <= 0:
+            return
+        for job_id in [k for k, j in self._jobs.items() if j.finished_at][:excess]:
+            del self._jobs[job_id]
+
+    def _enter_stage(self, job: IngestJob, stage: str) -> float:
+        job.stage = stage
+        return time.perf_counter()
+
+    def _leave_stage(self, job: IngestJob, stage: str, started: float):
+        job.timings[stage] = round(job.timings.get(stage, 0.0) + time.perf_counter() - started, 3)
+
+    def _run(self, job: IngestJob, path: Path, content_hash: str, profile: Optional[str], source: Optional[str]):
+        job.status = "running"
+        try:
+            size = path.stat().st_size
+            # Another job writing the same document would diff against chunks
+            # this one is about to replace and delete them as stale
+            with self.documents.hold(job.document_id):
+                self._unregister(job.document_id)
+                job.result = self._pipeline(job, path, content_hash, profile)
+                self._register(
+                    job.document_id, job.file_name, content_hash, size, job.result["total_chunks"], source,
+                    file_service.converted_with(job.file_name, profile),
+                )
+            job.stage = "done"
+            job.progress = 1.0
+            job.status = "completed"
+        except Exception as e:
+            print(f"Ingestion job {job.id} ({job.file_name}) failed: {e}")
+            job.error = _error_message(e)
+            job.status = "failed"
+        finally:
+            path.unlink(missing_ok=True)
+            job.finished_at = datetime.utcnow()
+
+    def _run_bulk(self, job: IngestJob, upload: BulkUpload, profile: Optional[str]):
+        job.status = "running"
+        job.stage = "pipeline"
+        run = _BulkRun(self, job, profile)
+        try:
+            run.execute(upload)
+            job.stage = "done"
+            job.progress = 1.0
+            job.status = "completed"
+        except Exception as e:
+            print(f"Bulk ingestion job {job.id} ({job.file_name}) failed: {e}")
+            job.error = _error_message(e)
+            job.status = "failed"
+        finally:
+            # Deletes whatever a failed run did not get to
+            upload.close()
+            job.result = run.report()
+            job.timings = run.busy_seconds()
+            job.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def _unregister(document_id: str):
+        """Forget a document's registered content before its chunks are rewritten.
+
+        Until the new version is registered the index holds a mix of old and
+        new chunks (or, after a failure, whatever got written), so the old
+        bytes must not be answered as already indexed in the meantime.
+        """
+        with Session(engine) as db:
+            document_registry_service.remove_document(db, document_id)
+
+    def _register(
+        self,
+        document_id: str,
+        file_name: str,
+        content_hash: str,
+        size: int,
+        total_chunks: int,
+        source_path: Optional[str],
+        profile: Optional[str],
+    ):
+        """Record the file in the document registry so identical re-uploads are skipped."""
+        try:
+            with Session(engine) as db:
+                document_registry_service.register(
+                    db,
+                    content_hash=content_hash,
+                    document_id=document_id,
+                    file_name=file_name,
+                    size=size,
+                    total_chunks=total_chunks,
+                    source_path=source_path,
+                    profile=profile,
+                )
+        except Exception as e:
+            # The document is indexed either way; only deduplication is lost
+            print(f"Document registry update failed for {file_name}: {e}")
+
+    # ── Stages (shared by single-file and bulk jobs) ──────────────────────────
+
+    @staticmethod
+    def _parse(path: Path, file_name: str, content_hash: str, profile: Optional[str]) -> Tuple[Any, str]:
+        raw_content, file_type = file_service.process_file(path, file_name, content_hash, profile)
+
+        if file_type in {"csv", "xlsx"}:
+            try:
+                if file_type == "xlsx" and path.stat().st_size >= settings.INGEST.XLSX_STREAMING_MB * 1024 * 1024:
+                    # Rows are read lazily while the document is chunked
+                    return chunking_service.stream_xlsx(raw_content), file_type
+                return chunking_service.load_table(raw_content, file_type), file_type
+            except Exception as e:
+                print(f"{file_type.upper()} parse error: {e}")
+                # A malformed CSV is still worth indexing as plain text
+                text = chunking_service.read_text(raw_content) if file_type == "csv" else ""
+                return text, "text"
+        if file_type == "json":
+            try:
+                if path.stat().st_size >= settings.INGEST.JSON_STREAMING_MB * 1024 * 1024:
+                    # Parsed incrementally while the document is chunked. A
+                    # parse error only surfacing then would leave the document
+                    # half replaced, so the file is checked in a first pass and
+                    # falls back to text like a small one.
+                    try:
+                        chunking_service.check_json(raw_content)
+                        return chunking_service.stream_json(raw_content), file_type
+                    except DuplicateKeyError:
+                        # Repeated keys keep their last value, which only a
+                        # full load can reproduce
+                        pass
+                return chunking_service.load_json(raw_content), file_type
+            except Exception as e:
+                print(f"JSON parse error: {e}")
+                return chunking_service.read_text(raw_content), "text"
+        if file_type in {"text", "code"}:
+            return chunking_service.read_text(raw_content), file_type
+        # "docling" — pass DoclingDocument directly
+        return raw_content, file_type
+
+    @staticmethod
+    def _diff(existing: Dict[str, dict], chunks: List[Chunk]) -> Tuple[List[Chunk], Dict[str, dict]]:
+        """Split chunks against what is already indexed for the document.
+
+        ``existing`` is {id: metadata} from vector_service.get_document_chunks();
+        matched ids are popped, so whatever remains after the last batch is
+        stale and should be deleted. Returns (chunks to embed, {id: metadata}
+        to update).
+        """
+        new_chunks: List[Chunk] = []
+        changed_meta: Dict[str, dict] = {}
+        for chunk in chunks:
+            stored = existing.pop(chunk.id, None)
+            if stored is None:
+                new_chunks.append(chunk)
+            elif stored != (meta := chunk.metadata):
+                # Same content, but e.g. its position or page moved
+                changed_meta[chunk.id] = meta
+        return new_chunks, changed_meta
+
+    @staticmethod
+    def _near_duplicate_filter(file_type: str) -> Optional[NearDuplicateFilter]:
+        """A fresh per-document filter, or None if suppression is off for the file type."""
+        max_distance = settings.INGEST.DEDUP_MAX_DISTANCE
+        if max_distance < 0 or file_type not in settings.INGEST.DEDUP_FILE_TYPES:
+            return None
+        return NearDuplicateFilter(max_distance)
+
+    @staticmethod
+    def _drop_cross_document(document_id: str, new_chunks: List[Chunk]) -> Tuple[List[Chunk], int]:
+        """Drop new chunks that near-duplicate another document (INGEST.DEDUP_ACROSS_DOCUMENTS).
+
+        Returns (chunks to keep, number dropped).
+        """
+        if not settings.INGEST.DEDUP_ACROSS_DOCUMENTS or not new_chunks:
+            return new_chunks, 0
+        duplicates = vector_service.find_near_duplicates(new_chunks, document_id)
+        return [c for c in new_chunks if c.id not in duplicates], len(duplicates)
+
+    @staticmethod
+    def _upsert(
+        new_chunks: List[Chunk],
+        embeddings: List[List[float]],
+        changed_meta: Dict[str, dict],
+        removed_ids: List[str],
+    ):
+        if new_chunks:
+            vector_service.upsert_embedded(new_chunks, embeddings)
+        vector_service.update_metadata(changed_meta)
+        vector_service.delete_points(removed_ids)
+
+    def _upload(
+        self,
+        job: IngestJob,
+        new_chunks: List[Chunk],
+        embeddings: List[List[float]],
+        changed_meta: Dict[str, dict],
+        chunks_done: int,
+        expected: int,
+    ):
+        """Upsert one batch of a single-file job (on its upload thread)."""
+        started = time.perf_counter()
+        self._upsert(new_chunks, embeddings, changed_meta, [])
+        self._leave_stage(job, "upsert", started)
+        job.chunks_done = chunks_done
+        # Estimates can fall short; progress only reaches 1.0 once the job is done
+        job.progress = _PARSE_WEIGHT + (1 - _PARSE_WEIGHT) * min(chunks_done / expected, 0.99)
+
+    def _pipeline(
+        self, job: IngestJob, path: Path, content_hash: str, profile: Optional[str]
+    ) -> Dict[str, Any]:
+        # ── parse ──
+        t = self._enter_stage(job, "parse")
+        final_content, file_type = self._parse(path, job.file_name, content_hash, profile)
+        self._leave_stage(job, "parse", t)
+        job.progress = _PARSE_WEIGHT
+
+        # ── chunk → diff → embed → upsert ── one batch at a time: chunks are
+        # generated lazily, so memory is bounded by the batch size and the
+        # first batches land in Qdrant while the rest is still being chunked.
+        # The number of chunks is not known up front: progress is measured
+        # against the chunk count of the previous version of the document,
+        # or for a new one an estimate from the file size.
+        t = self._enter_stage(job, "diff")
+        document_id = job.document_id
+        existing = vector_service.get_document_chunks(document_id)
+        expected = len(existing) or max(path.stat().st_size // _BYTES_PER_CHUNK, 1)
+        self._leave_stage(job, "diff", t)
+
+        t = self._enter_stage(job, "chunk")
+        chunks = chunking_service.iter_chunks(
+            final_content,
+            job.file_name,
+            document_id,
+            file_type=file_type,
+        )
+        del final_content
+        # Repeated boilerplate is dropped here, before it is diffed or embedded
+        near_duplicates = self._near_duplicate_filter(file_type)
+        if near_duplicates:
+            chunks = near_duplicates(chunks)
+        self._leave_stage(job, "chunk", t)
+        total = added = updated = suppressed = 0
+        preview: List[dict] = []
+
+        # Each batch is upserted on a second thread while the next one is
+        # chunked and embedded; one upload is in flight at a time
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert") as uploader:
+            pending: Optional[Future] = None
+            while True:
+                t = self._enter_stage(job, "chunk")
+                batch = list(itertools.islice(chunks, settings.INGEST.STREAM_BATCH))
+                self._leave_stage(job, "chunk", t)
+                if not batch:
+                    break
+                preview.extend({**c.to_payload(), "id": c.id} for c in batch[: 3 - len(preview)])
+
+                t = self._enter_stage(job, "diff")
+                new_chunks, changed_meta = self._diff(existing, batch)
+                new_chunks, dropped = self._drop_cross_document(document_id, new_chunks)
+                self._leave_stage(job, "diff", t)
+
+                t = self._enter_stage(job, "embed")
+                embeddings = vector_service.embed_chunks(new_chunks)
+                self._leave_stage(job, "embed", t)
+
+                total += len(batch) - dropped
+                suppressed += dropped
+                added += len(new_chunks)
+                updated += len(changed_meta)
+                if pending:
+                    pending.result()
+                pending = uploader.submit(
+                    self._upload, job, new_chunks, embeddings, changed_meta, total, expected
+                )
+            if pending:
+                pending.result()
+
+        # Whatever was not matched no longer exists in the document
+        t = self._enter_stage(job, "upsert")
+        removed_ids = list(existing)
+        vector_service.delete_points(removed_ids)
+        self._leave_stage(job, "upsert", t)
+        if near_duplicates:
+            suppressed += near_duplicates.suppressed
+
+        return {
+            "document_id": document_id,
+            "file_name": job.file_name,
+            "file_type": file_type,
+            "total_chunks": total,
+            "added_chunks": added,
+            "updated_chunks": updated,
+            "unchanged_chunks": total - added - updated,
+            "removed_chunks": len(removed_ids),
+            "suppressed_chunks": suppressed,
+            "chunks_preview": preview,
+            "message": (
+                f"Indexed {total} chunks into Vector DB "
+                f"({added} embedded, {len(removed_ids)} removed, {suppressed} near-duplicates suppressed)"
+            ),
+        }
+
+
+# ── Bulk pipeline ─────────────────────────────────────────────────────────────
+
+# End-of-stream marker passed down the stage queues
+_DONE = object()
+
+
+@dataclass
+class _BulkFile:
+    """One file travelling through the bulk pipeline."""
+    source: str
+    file_name: str
+    upload: SpooledUpload
+    document_id: str
+    source_path: Optional[str] = None   # None when source is only the file name
+    content: Any = None
+    file_type: str = ""
+    total_chunks: int = 0
+    added_chunks: int = 0
+    suppressed_chunks: int = 0
+    failed: bool = False
+    locked: bool = False            # holds its document lock (chunk → last upsert)
+
+
+@dataclass
+class _BulkBatch:
+    """Up to INGEST.STREAM_BATCH chunks of one file on their way to Qdrant.
+
+    The file's final batch (``last``) carries no chunks, only the ids of
+    stale points to delete; upserting it completes the file.
+    """
+    file: _BulkFile
+    new_chunks: List[Chunk] = field(default_factory=list)
+    changed_meta: Dict[str, dict] = field(default_factory=dict)
+    removed_ids: List[str] = field(default_factory=list)
+    last: bool = False
+    embeddings: List[List[float]] = field(default_factory=list)
+
+
+class _BulkRun:
+    """Ingests many files with every stage running concurrently.
+
+    parse (one thread per conversion worker) → chunk + diff → embed → upsert,
+    connected by bounded queues: while Docling converts one file the embedder
+    works on chunks of the previous ones, and a slow stage applies
+    back-pressure instead of letting parsed documents pile up in memory.
+    Files are chunked lazily and travel on as batches of chunks, so a large
+    file is never held as a whole and starts landing in Qdrant early.
+    A failing file is recorded and its remaining batches are dropped; the
+    rest keep flowing.
+    """
+
+    def __init__(self, service: IngestService, job: IngestJob, profile: Optional[str]):
+        self.service = service
+        self.job = job
+        self.profile = profile
+        depth = settings.INGEST.BULK_QUEUE_SIZE
+        self.parse_q: "queue.Queue" = queue.Queue(maxsize=depth)
+        self.chunk_q: "queue.Queue" = queue.Queue(maxsize=depth)
+        self.embed_q: "queue.Queue" = queue.Queue(maxsize=depth)
+        self.upsert_q: "queue.Queue" = queue.Queue(maxsize=depth)
+        self.parsers = settings.INGEST.conversion_workers
+        self.embed_batch = settings.INGEST.BULK_EMBED_BATCH
+
+        self._lock = threading.Lock()
+        self._busy: Dict[str, float] = {stage: 0.0 for stage in ("parse", "chunk", "embed", "upsert")}
+        self._started = time.perf_counter()
+        self._elapsed: Optional[float] = None
+        self.files: List[Dict[str, Any]] = []
+        self.total = 0
+        self.indexed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.total_chunks = 0
+        self.added_chunks = 0
+        self.removed_chunks = 0
+        self.suppressed_chunks = 0
+        # Files that took their document lock, see _chunk
+        self._locked: List[_BulkFile] = []
+
+    # ── Orchestration ─────────────────────────────────────────────────────────
+
+    def execute(self, entries: Iterable[BulkEntry]):
+        threads = [threading.Thread(target=self._parse_loop) for _ in range(self.parsers)]
+        chunker = threading.Thread(target=self._chunk_loop)
+        embedder = threading.Thread(target=self._embed_loop)
+        writer = threading.Thread(target=self._upsert_loop)
+        for thread in [*threads, chunker, embedder, writer]:
+            thread.name = f"bulk-{self.job.id[:8]}"
+            thread.start()
+
+        try:
+            self._feed(entries)
+        finally:
+            # Drain stage by stage so every queued file is finished or failed
+            for _ in threads:
+                self.parse_q.put(_DONE)
+            for thread in threads:
+                thread.join()
+            for inbox, thread in ((self.chunk_q, chunker), (self.embed_q, embedder), (self.upsert_q, writer)):
+                inbox.put(_DONE)
+                thread.join()
+            for item in self._locked:
+                self._unlock(item)
+            self._elapsed = time.perf_counter() - self._started
+
+    def _feed(self, entries: Iterable[BulkEntry]):
+        """Queue every entry for parsing, skipping content that is already indexed."""
+        first_seen: Dict[Tuple[str, Optional[str]], str] = {}   # (sha256, source path) → source
+        sources: Set[str] = set()
+        with Session(engine) as db:
+            for entry in entries:
+                with self._lock:
+                    self.total += 1
+                if entry.skipped:
+                    self._finish(entry.source, "skipped", reason=entry.skipped)
+                    continue
+                upload = entry.upload
+                source_path = entry.source if entry.has_path else None
+                reason, document_id = None, None
+                if (upload.sha256, source_path) in first_seen:
+                    reason = f"Same content as '{first_seen[upload.sha256, source_path]}'"
+                elif entry.has_path and entry.source in sources:
+                    reason = "Duplicate path in this upload"
+                else:
+                    try:
+                        existing = document_registry_service.find_indexed(
+                            db, upload.sha256, source_path, file_service.converted_with(entry.file_name, self.profile)
+                        )
+                    except Exception:
+                        upload.path.unlink(missing_ok=True)
+                        raise
+                    if existing:
+                        reason = f"Identical file already indexed as '{existing.file_name}'"
+                        document_id = existing.document_id
+                if reason:
+                    upload.path.unlink(missing_ok=True)
+                    self._finish(entry.source, "skipped", reason=reason, document_id=document_id)
+                    continue
+                first_seen[upload.sha256, source_path] = entry.source
+                sources.add(entry.source)
+                self.parse_q.put(_BulkFile(
+                    source=entry.source,
+                    file_name=entry.file_name,
+                    upload=upload,
+                    # A bare file name is no identity; see IngestService.submit
+                    document_id=document_id_for(source_path) if source_path else str(uuid.uuid4()),
+                    source_path=source_path,
+                ))
+
+    def _parse_loop(self):
+        while (item := self.parse_q.get()) is not _DONE:
+            with self._timed("parse", [item]):
+                self._parse(item)
+            if not item.failed:
+                self.chunk_q.put(item)
+
+    def _chunk_loop(self):
+        while (item := self.chunk_q.get()) is not _DONE:
+            batches = self._chunk(item)
+            while True:
+                batch = None
+                # Only producing the batch is timed, not waiting on a full queue
+                with self._timed("chunk", [item]):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                if item.failed:
+                    # A later stage failed the file; stop chunking it
+                    batches.close()
+                    break
+                self.embed_q.put(batch)
+
+    def _embed_loop(self):
+        """Embed chunks, pooling batches of several small files into one model call."""
+        done = False
+        while not done:
+            batch = self.embed_q.get()
+            if batch is _DONE:
+                return
+            group = [batch]
+            pending = len(batch.new_chunks)
+            while pending < self.embed_batch:
+                try:
+                    batch = self.embed_q.get_nowait()
+                except queue.Empty:
+                    break
+                if batch is _DONE:
+                    done = True
+                    break
+                group.append(batch)
+                pending += len(batch.new_chunks)
+            group = [batch for batch in group if not batch.file.failed]
+            with self._timed("embed", list({id(b.file): b.file for b in group}.values())):
+                self._embed(group)
+            for batch in group:
+                if not batch.file.failed:
+                    self.upsert_q.put(batch)
+
+    def _upsert_loop(self):
+        while (batch := self.upsert_q.get()) is not _DONE:
+            if not batch.file.failed:
+                with self._timed("upsert", [batch.file]):
+                    self._upsert(batch)
+
+    @contextmanager
+    def _timed(self, stage: str, items: List[_BulkFile]):
+        """Time one unit of stage work; on error fail its files instead of the whole run."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            for item in items:
+                with self._lock:
+                    if item.failed:
+                        continue
+                    item.failed = True
+                print(f"Bulk ingestion of {item.source} failed during {stage}: {e}")
+                self._unlock(item)
+                item.content = None
+                item.upload.path.unlink(missing_ok=True)
+                self._finish(item.source, "failed", reason=_error_message(e))
+        finally:
+            with self._lock:
+                self._busy[stage] += time.perf_counter() - started
+
+    # ── Stages ────────────────────────────────────────────────────────────────
+
+    def _parse(self, item: _BulkFile):
+        item.content, item.file_type = self.service._parse(
+            item.upload.path, item.file_name, item.upload.sha256, self.profile
+        )
+
+    def _chunk(self, item: _BulkFile) -> Iterator[_BulkBatch]:
+        """Chunk and diff a file lazily, one batch per step."""
+        chunks = chunking_service.iter_chunks(
+            item.content, item.file_name, item.document_id, file_type=item.file_type
+        )
+        item.content = None
+        near_duplicates = self.service._near_duplicate_filter(item.file_type)
+        if near_duplicates:
+            chunks = near_duplicates(chunks)
+        # Held until the file's last batch is upserted (or the file fails)
+        self.service.documents.acquire(item.document_id)
+        with self._lock:
+            item.locked = True
+            self._locked.append(item)
+        self.service._unregister(item.document_id)
+        existing = vector_service.get_document_chunks(item.document_id)
+        while batch := list(itertools.islice(chunks, settings.INGEST.STREAM_BATCH)):
+            new_chunks, changed_meta = self.service._diff(existing, batch)
+            new_chunks, dropped = self.service._drop_cross_document(item.document_id, new_chunks)
+            item.total_chunks += len(batch) - dropped
+            item.suppressed_chunks += dropped
+            yield _BulkBatch(item, new_chunks, changed_meta)
+        if near_duplicates:
+            item.suppressed_chunks += near_duplicates.suppressed
+        item.upload.path.unlink(missing_ok=True)
+        yield _BulkBatch(item, removed_ids=list(existing), last=True)
+
+    def _embed(self, group: List[_BulkBatch]):
+        chunks = [c for batch in group for c in batch.new_chunks]
+        if not chunks:
+            return
+        vectors = vector_service.embed_chunks(chunks)
+        offset = 0
+        for batch in group:
+            batch.embeddings = vectors[offset: offset + len(batch.new_chunks)]
+            offset += len(batch.new_chunks)
+
+    def _upsert(self, batch: _BulkBatch):
+        item = batch.file
+        self.service._upsert(batch.new_chunks, batch.embeddings, batch.changed_meta, batch.removed_ids)
+        item.added_chunks += len(batch.new_chunks)
+        if not batch.last:
+            return
+        self.service._register(
+            item.document_id, item.file_name, item.upload.sha256, item.upload.size, item.total_chunks,
+            item.source_path, file_service.converted_with(item.file_name, self.profile),
+        )
+        self._unlock(item)
+        self._finish(
+            item.source,
+            "indexed",
+            document_id=item.document_id,
+            total_chunks=item.total_chunks,
+            added_chunks=item.added_chunks,
+            removed_chunks=len(batch.removed_ids),
+            suppressed_chunks=item.suppressed_chunks,
+        )
+
+    def _unlock(self, item: _BulkFile):
+        with self._lock:
+            if not item.locked:
+                return
+            item.locked = False
+        self.service.documents.release(item.document_id)
+
+    # ── Reporting ─────────────────────────────────────────────────────────────
+
+    def _finish(self, source: str, status: str, **details):
+        with self._lock:
+            self.files.append({"source": source, "status": status, **details})
+            if status == "indexed":
+                self.indexed += 1
+                self.total_chunks += details["total_chunks"]
+                self.added_chunks += details["added_chunks"]
+                self.removed_chunks += details["removed_chunks"]
+                self.suppressed_chunks += details["suppressed_chunks"]
+            elif status == "skipped":
+                self.skipped += 1
+            else:
+                self.failed += 1
+            self.job.progress = len(self.files) / max(self.total, 1)
+
+    def busy_seconds(self) -> Dict[str, float]:
+        """Time each stage spent working (summed over its threads)."""
+        with self._lock:
+            return {stage: round(seconds, 3) for stage, seconds in self._busy.items()}
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._started
+        with self._lock:
+            return {
+                "files_total": self.total,
+                "files_indexed": self.indexed,
+                "files_skipped": self.skipped,
+                "files_failed": self.failed,
+                "total_chunks": self.total_chunks,
+                "added_chunks": self.added_chunks,
+                "removed_chunks": self.removed_chunks,
+                "suppressed_chunks": self.suppressed_chunks,
+                "elapsed_seconds": round(elapsed, 3),
+                "files_per_sec": round(self.indexed / elapsed, 3) if elapsed else 0.0,
+                "chunks_per_sec": round(self.total_chunks / elapsed, 3) if elapsed else 0.0,
+                "files": list(self.files),
+                "message": (
+                    f"Indexed {self.indexed} of {self.total} files "
+                    f"({self.skipped} skipped, {self.failed} failed), {self.total_chunks} chunks"
+                ),
+            }
+
+
+ingest_service = IngestService(
+    max_workers=settings.INGEST.workers,
+    history=settings.INGEST.JOB_HISTORY,
+)
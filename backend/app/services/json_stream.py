@@ -0,0 +1,172 @@
+"""
+Iterative JSON flattening.
+
+Turns a JSON document into (parent path, path, value) leaves, e.g.
+``{"a": {"b": [1, 2]}}`` → ("a.b", "a.b[0]", 1), ("a.b", "a.b[1]", 2).
+
+``flatten_json`` walks an already-loaded object; ``iter_json_leaves`` parses
+a file incrementally in fixed-size blocks, so memory depends on the nesting
+depth and the longest single value, not on the file size. Neither recurses,
+so arbitrarily deep documents are fine.
+
+``iter_json_leaves`` accepts what ``json.loads`` accepts. The one case it
+cannot mirror while streaming is a repeated object key, where json.loads
+keeps the last value at the first key's position; it raises
+DuplicateKeyError instead, so the caller can load such a document whole.
+"""
+
+import json
+import re
+from typing import Any, Iterator, TextIO, Tuple
+
+Leaf = Tuple[str, str, Any]   # (parent path, path, value)
+
+# Characters read per block
+_BLOCK = 64 * 1024
+
+# One token, after optional whitespace: punctuation | string body | scalar.
+# Numbers follow the JSON grammar (no leading zeros, digits on both sides of
+# the point); the constants are the ones json.loads accepts.
+_TOKEN = re.compile(
+    r'[ \t\n\r]*(?:([{}\[\]:,])|"((?:[^"\\\x00-\x1f]|\\.)*)"'
+    r"|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|-?Infinity|true|false|null|NaN))"
+)
+# A number can match only a prefix of itself, e.g. "1" of "1e+5"; the rest
+# is at most this long, so a match closer to the end of the buffer may continue
+_NUMBER_TAIL = 2
+_TRAILING_WHITESPACE = re.compile(r"[ \t\n\r]*\Z")
+_CONSTANTS = {
+    "true": True, "false": False, "null": None,
+    "NaN": float("nan"), "Infinity": float("inf"), "-Infinity": float("-inf"),
+}
+
+
+class DuplicateKeyError(ValueError):
+    """An object repeats a key; see the module docstring."""
+
+
+def _key_path(prefix: str, key: Any) -> str:
+    return f"{prefix}.{key}" if prefix else str(key)
+
+
+def flatten_json(obj: Any) -> Iterator[Leaf]:
+    """Leaves of a loaded JSON value in document order, without recursion."""
+    # (parent path, path, value) still to visit, next one on top
+    stack = [("", "", obj)]
+    while stack:
+        parent, path, value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend((path, _key_path(path, k), v) for k, v in reversed(value.items()))
+        elif isinstance(value, list):
+            stack.extend((path, f"{path}[{i}]", v) for i, v in reversed(list(enumerate(value))))
+        else:
+            yield parent, path, value
+
+
+def _scalar(token: str) -> Any:
+    if token in _CONSTANTS:
+        return _CONSTANTS[token]
+    if token.isdigit() or token[1:].isdigit():
+        return int(token)
+    return float(token)
+
+
+def _tokens(stream: TextIO) -> Iterator[Tuple[str, Any]]:
+    """Tokenize a text stream block by block as (kind, value) pairs.
+
+    kind is a punctuation character, "string" or "value". A token that
+    ends near the end of the buffer may continue in the next block, so the
+    buffer is refilled before it is accepted.
+    """
+    buf, pos, eof = "", 0, False
+    while True:
+        match = _TOKEN.match(buf, pos)
+        if (match is None or len(buf) - match.end() <= _NUMBER_TAIL) and not eof:
+            # Read at least as much as is buffered, so a long value is not
+            # rescanned over and over
+            chunk = stream.read(max(_BLOCK, len(buf) - pos))
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+        if match is None:
+            if _TRAILING_WHITESPACE.match(buf, pos):
+                return
+            raise ValueError(f"Invalid JSON near {buf[pos:pos + 20]!r}")
+        pos = match.end()
+        punctuation, string, scalar = match.groups()
+        if punctuation:
+            yield punctuation, None
+        elif string is not None:
+            yield "string", json.loads(f'"{string}"') if "\\" in string else string
+        else:
+            yield "value", _scalar(scalar)
+
+
+def iter_json_leaves(stream: TextIO) -> Iterator[Leaf]:
+    """Parse a JSON document incrementally and yield its leaves in order.
+
+    Produces exactly what ``flatten_json(json.load(stream))`` would; empty
+    objects and arrays yield nothing. Raises ValueError on malformed input,
+    possibly after some leaves have been yielded, and DuplicateKeyError if
+    an object repeats a key. Keys of the objects still open are remembered
+    to detect that.
+    """
+    tokens = _tokens(stream)
+
+    def next_token() -> Tuple[str, Any]:
+        return next(tokens, ("", None))
+
+    def read_key(kind: str, key: Any, seen: set) -> str:
+        if kind != "string":
+            raise ValueError("Invalid JSON: expected an object key")
+        if next_token()[0] != ":":
+            raise ValueError("Invalid JSON: expected ':' after an object key")
+        if key in seen:
+            raise DuplicateKeyError(f"Duplicate JSON object key {key!r}")
+        seen.add(key)
+        return key
+
+    # One frame per open container: [path, is_array, next array index, keys seen]
+    stack: list[list] = []
+    parent, path = "", ""
+    pending = None   # token already read that starts the next value
+
+    while True:
+        # ── read one value at `path` ──
+        kind, value = pending or next_token()
+        pending = None
+        if kind == "{":
+            kind, key = next_token()
+            if kind != "}":
+                stack.append([path, False, 0, set()])
+                parent, path = path, _key_path(path, read_key(kind, key, stack[-1][3]))
+                continue
+        elif kind == "[":
+            pending = next_token()
+            if pending[0] != "]":
+                stack.append([path, True, 1, None])
+                parent, path = path, f"{path}[0]"
+                continue
+            pending = None
+        elif kind in ("string", "value"):
+            yield parent, path, value
+        else:
+            raise ValueError(f"Invalid JSON: expected a value, got {kind or 'end of input'!r}")
+
+        # ── value complete: move to the next sibling, closing finished containers ──
+        while stack:
+            frame = stack[-1]
+            kind, _ = next_token()
+            if kind == ",":
+                if frame[1]:
+                    parent, path = frame[0], f"{frame[0]}[{frame[2]}]"
+                    frame[2] += 1
+                else:
+                    parent, path = frame[0], _key_path(frame[0], read_key(*next_token(), frame[3]))
+                break
+            if kind != ("]" if frame[1] else "}"):
+                raise ValueError(f"Invalid JSON: unexpected {kind or 'end of input'!r}")
+            stack.pop()
+        else:
+            if next_token()[0]:
+                raise ValueError("Invalid JSON: extra data after the document")
+            return
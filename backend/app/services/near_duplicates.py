@@ -0,0 +1,78 @@
+"""
+Near-duplicate chunk detection with 64-bit SimHash.
+
+Repeated boilerplate (disclaimers, tables of contents, per-page headers that
+Docling keeps) turns into chunks whose text is identical or nearly so. Each
+chunk gets a SimHash over its word 3-grams; two chunks whose hashes differ in
+at most ``max_distance`` bits are treated as duplicates.
+
+Lookups use the usual banding trick: the hash is cut into ``max_distance + 1``
+bands, and by the pigeonhole principle two hashes within that distance share
+at least one band exactly, so only chunks with a matching band are compared.
+"""
+
+import hashlib
+import re
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+_BITS = 64
+_WORD = re.compile(r"\w+")
+_SHIFTS = np.arange(_BITS, dtype=np.uint64)
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the lower-cased word 3-grams of ``text``."""
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))] if words else [text]
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # Per bit: set in more than half of the shingle hashes → set in the SimHash
+    ones = ((hashes[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0)
+    return int(((ones * 2 > len(hashes)).astype(np.uint64) << _SHIFTS).sum())
+
+
+def band_keys(value: int, max_distance: int) -> List[str]:
+    """Band keys of a SimHash; near-duplicates share at least one key."""
+    bands = max_distance + 1
+    width = -(-_BITS // bands)
+    mask = (1 << width) - 1
+    return [f"{bands}:{i}:{(value >> (i * width)) & mask:x}" for i in range(bands)]
+
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateFilter:
+    """Drops chunks that are near-duplicates of an earlier chunk in the same stream.
+
+    Use one filter per document. Kept chunks get their ``simhash`` set so
+    they can be matched across documents later (see
+    VectorService.find_near_duplicates()); ``suppressed`` counts the rest.
+    """
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self.suppressed = 0
+        self._buckets: Dict[str, List[int]] = {}
+
+    def __call__(self, chunks: Iterable) -> Iterator:
+        for chunk in chunks:
+            value = simhash(chunk.content)
+            keys = band_keys(value, self.max_distance)
+            if any(
+                distance(value, seen) <= self.max_distance
+                for key in keys
+                for seen in self._buckets.get(key, ())
+            ):
+                self.suppressed += 1
+                continue
+            for key in keys:
+                self._buckets.setdefault(key, []).append(value)
+            chunk.simhash = value
+            yield chunk
@@ -0,0 +1,147 @@
+"""
+Micro-batching of concurrent query embeddings.
+
+Every search embeds its query, and the ONNX model handles a batch of queries
+in little more time than a single one. The batcher collects the queries of
+concurrent requests for up to EMBEDDING.QUERY_MAX_WAIT_MS (or until
+EMBEDDING.QUERY_BATCH_SIZE are waiting), embeds them in one call on a
+dedicated thread and hands each caller its vector. One batch is in flight at a
+time: queries arriving while it runs gather, and go out together (up to the
+batch size) as soon as it finishes, so batches grow with load and a lone
+query waits at most the max wait.
+"""
+
+import asyncio
+import bisect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+from app.core.config import settings
+from app.services.vector_service import vector_service
+
+
+class Histogram:
+    """Counts of observed values per bucket (upper bounds, inclusive)."""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            count = sum(self.counts)
+            labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+            return {
+                "count": count,
+                "mean": round(self.total / count, 3) if count else 0.0,
+                "buckets": dict(zip(labels, self.counts)),
+            }
+
+
+class QueryEmbeddingBatcher:
+    def __init__(self, embed: Callable[[List[str]], List[List[float]]], max_batch: int, max_wait_ms: float):
+        self.embed_batch = embed
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000
+        # One thread: batches run back to back, the model uses the cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-embed")
+        # (query, future, submitted at), only touched on the event loop
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # A batch is being embedded; new queries only gather meanwhile
+        self._running = False
+        self.queue_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000])
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    async def embed(self, query: str) -> List[float]:
+        """The query's vector, computed together with other pending queries."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, future, time.perf_counter()))
+        # While a batch runs, queries only gather; it flushes them when done
+        if not self._running:
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_ms": self.queue_ms.to_dict(),
+            "batch_size": self.batch_size.to_dict(),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _flush(self):
+        """Send up to max_batch pending queries to the executor, unless a batch is running."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._running:
+            return
+        # Callers that gave up (client disconnected) need no vector
+        self._pending = [item for item in self._pending if not item[1].done()]
+        if not self._pending:
+            return
+        batch, self._pending = self._pending[: self.max_batch], self._pending[self.max_batch:]
+        try:
+            result = asyncio.get_running_loop().run_in_executor(self._executor, self._run, batch)
+        except RuntimeError as e:
+            # Shut down; fail these callers instead of leaving them waiting
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self._running = True
+        result.add_done_callback(lambda done: self._finished(batch, done))
+
+    def _finished(self, batch: list[tuple[str, asyncio.Future, float]], done: asyncio.Future):
+        self._running = False
+        self._deliver(batch, done)
+        # Whatever gathered meanwhile has waited long enough
+        self._flush()
+
+    def _run(self, batch: list[tuple[str, asyncio.Future, float]]) -> List[List[float]]:
+        started = time.perf_counter()
+        for _, _, submitted in batch:
+            self.queue_ms.observe((started - submitted) * 1000)
+        self.batch_size.observe(len(batch))
+        return self.embed_batch([query for query, _, _ in batch])
+
+    @staticmethod
+    def _deliver(batch: list[tuple[str, asyncio.Future, float]], done: asyncio.Future):
+        error = None if done.cancelled() else done.exception()
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():
+                continue
+            if done.cancelled():
+                future.cancel()
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[i])
+
+
+query_batcher = QueryEmbeddingBatcher(
+    embed=vector_service.embed_queries,
+    max_batch=settings.EMBEDDING.QUERY_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING.QUERY_MAX_WAIT_MS,
+)
@@ -0,0 +1,90 @@
+"""
+In-process LRU cache of query vectors.
+
+Popular and repeated questions (dashboards, retries after a disconnect) skip
+query embedding entirely: no batching delay, no thread hop, no SQLite lookup
+in the embedding cache. Keyed by embedding model and whitespace-normalized
+query; bounded by entry count, and entries expire after a TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.embedding_cache import normalize
+
+
+class QueryVectorCache:
+    def __init__(self, model_name: str, max_entries: int, ttl_seconds: float):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key → (expires at, vector), least recently used first
+        self._entries: "OrderedDict[str, tuple[float, List[float]]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def key(self, query: str) -> str:
+        return f"{self.model_name}\0{normalize(query)}"
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def get(self, query: str) -> Optional[List[float]]:
+        if not self.enabled:
+            return None
+        key = self.key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, query: str, vector: List[float]):
+        if not self.enabled:
+            return
+        key = self.key(query)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "model": self.model_name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+query_cache = QueryVectorCache(
+    model_name=settings.EMBED_MODEL,
+    max_entries=settings.EMBEDDING.QUERY_CACHE_SIZE,
+    ttl_seconds=settings.EMBEDDING.QUERY_CACHE_TTL_SECONDS,
+)
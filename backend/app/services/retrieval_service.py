@@ -1,25 +1,36 @@
 from typing import List, Dict, Any
 from app.core.config import settings
-from app.services.vector_service import vector_service
-from qdrant_client import models
+from app.services.query_batcher import query_batcher
+from app.services.query_cache import query_cache
+from qdrant_client import AsyncQdrantClient, models
 
 
 class RetrievalService:
-    def __init__(self):
-        self.client = vector_service.client
-        self.model = vector_service.model
+    """Read path for the API. Qdrant is queried with the async client so a
+    search never blocks the event loop; query embedding runs in a worker
+    thread for the same reason (see query_batcher)."""
+
+    def __init__(self, client: AsyncQdrantClient | None = None):
+        self.client = client or AsyncQdrantClient(**settings.QDRANT.client_options)
         self.collection_name = settings.QDRANT.COLLECTION_NAME
 
+    async def close(self):
+        await self.client.close()
+
     async def search(self, query: str, limit: int = 5, min_score: float = 0.3) -> List[Dict[str, Any]]:
         """Semantic search for relevant chunks.
 
         Uses query_embed() so models like nomic-embed-text apply the
         'search_query:' prefix automatically — giving better recall than
-        plain embed() on the query side.
+        plain embed() on the query side. Concurrent searches share one
+        model call; repeated queries are answered from the query cache.
         """
-        query_vector = list(self.model.query_embed([query]))[0].tolist()
+        query_vector = query_cache.get(query)
+        if query_vector is None:
+            query_vector = await query_batcher.embed(query)
+            query_cache.put(query, query_vector)
 
-        response = self.client.query_points(
+        response = await self.client.query_points(
             collection_name=self.collection_name,
             query=query_vector,
             limit=limit,
@@ -63,7 +74,7 @@ class RetrievalService:
         docs: dict[str, str] = {}
         offset = None
         while True:
-            results, next_offset = self.client.scroll(
+            results, next_offset = await self.client.scroll(
                 collection_name=self.collection_name,
                 limit=1000,
                 offset=offset,
@@ -82,7 +93,7 @@ class RetrievalService:
         return [{"document_id": k, "file_name": v} for k, v in docs.items()]
 
     async def delete_document_by_id(self, document_id: str):
-        return self.client.delete(
+        return await self.client.delete(
             collection_name=self.collection_name,
             points_selector=models.Filter(
                 must=[
@@ -0,0 +1,243 @@
+"""
+Resumable uploads for files beyond the single-request size limit.
+
+Protocol:
+  1. POST   /ingest/uploads                 → create, returns upload_id
+  2. PUT    /ingest/uploads/{id}            → append a byte range (Content-Range)
+  3. GET    /ingest/uploads/{id}            → current offset, to resume after a drop
+  4. POST   /ingest/uploads/{id}/finalize   → verify and hand off to ingestion
+
+Bytes are appended to a ``.part`` file on disk as they stream in, so memory use
+is constant and everything received before a dropped connection is kept.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.file_service import SpooledUpload, file_service
+
+# Read size when hashing an assembled upload
+_HASH_CHUNK = 1024 * 1024
+# Received bytes are buffered up to this size per disk write
+_WRITE_CHUNK = 1024 * 1024
+
+
+@dataclass
+class UploadSession:
+    id: str
+    file_name: str
+    size: int
+    sha256: Optional[str] = None
+    source_path: Optional[str] = None
+    profile: Optional[str] = None     # Docling conversion profile
+    created_at: float = 0.0
+    offset: int = 0   # bytes received so far (size of the .part file)
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.id,
+            "file_name": self.file_name,
+            "size": self.size,
+            "offset": self.offset,
+            "complete": self.offset == self.size,
+        }
+
+
+class UploadService:
+    def __init__(self, directory: Path, ttl_seconds: int):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        # One per live upload: serializes range writes and finalize
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def create(
+        self,
+        file_name: str,
+        size: int,
+        sha256: Optional[str] = None,
+        source_path: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> UploadSession:
+        # Abandoned uploads are cleaned up as new ones arrive
+        self.purge_expired()
+        problem = file_service.unsupported_reason(
+            file_name, size, max_size=file_service.max_resumable_size
+        )
+        if problem:
+            raise HTTPException(status_code=problem[0], detail=problem[1])
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        upload = UploadSession(
+            id=str(uuid.uuid4()),
+            file_name=file_name,
+            size=size,
+            sha256=sha256.lower() if sha256 else None,
+            source_path=source_path,
+            profile=profile,
+            created_at=time.time(),
+        )
+        self._part_path(upload.id).touch()
+        self._meta_path(upload.id).write_text(json.dumps(asdict(upload)), encoding="utf-8")
+        return upload
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        try:
+            meta = json.loads(self._meta_path(upload_id).read_text(encoding="utf-8"))
+            meta["offset"] = self._part_path(upload_id).stat().st_size
+        except (OSError, ValueError):
+            return None
+        return UploadSession(**meta)
+
+    async def write_range(
+        self, upload_id: str, start: int, end: int, total: int, body: AsyncIterator[bytes]
+    ) -> UploadSession:
+        """Append the streamed byte range ``start``–``end`` (inclusive).
+
+        Ranges must be contiguous: ``start`` has to equal the current offset.
+        A client that lost its connection asks for the offset and resumes there;
+        a body that ends short of ``end`` or runs past it is rejected and the
+        range discarded.
+        """
+        async with self._locked(upload_id, "writing to"):
+            upload = self._require(upload_id)
+            if total != upload.size:
+                raise HTTPException(status_code=400, detail="Content-Range total does not match upload size")
+            if end >= total:
+                raise HTTPException(status_code=400, detail="Content-Range end is beyond the upload size")
+            if start != upload.offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Range must start at current offset {upload.offset}",
+                )
+            expected = end - start + 1
+            received = 0
+            buffer = bytearray()
+            with self._part_path(upload_id).open("ab") as out:
+                try:
+                    async for piece in body:
+                        received += len(piece)
+                        if received > expected:
+                            raise HTTPException(status_code=400, detail="Body is longer than the Content-Range")
+                        buffer += piece
+                        if len(buffer) >= _WRITE_CHUNK:
+                            await run_in_threadpool(out.write, bytes(buffer))
+                            buffer.clear()
+                    if received != expected:
+                        raise HTTPException(
+                            status_code=400,
+                            detail=f"Body has {received} bytes, Content-Range announced {expected}",
+                        )
+                except HTTPException:
+                    # A malformed range leaves nothing behind
+                    await run_in_threadpool(out.truncate, start)
+                    raise
+                except BaseException:
+                    # Dropped connection: keep everything received so the
+                    # client can resume from there (at most one buffer, so
+                    # written inline)
+                    out.write(buffer)
+                    raise
+                await run_in_threadpool(out.write, bytes(buffer))
+                upload.offset = start + received
+            # Activity keeps the upload alive for purge_expired()
+            os.utime(self._meta_path(upload_id))
+            return upload
+
+    async def finalize(self, upload_id: str) -> tuple[UploadSession, SpooledUpload]:
+        """Verify the assembled file and move it into the ingestion spool."""
+        async with self._locked(upload_id, "finalizing"):
+            upload = self._require(upload_id)
+            if upload.offset != upload.size:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {upload.offset} of {upload.size} bytes received",
+                )
+            result = await run_in_threadpool(self._assemble, upload)
+        self._locks.pop(upload_id, None)
+        return result
+
+    def _assemble(self, upload: UploadSession) -> tuple[UploadSession, SpooledUpload]:
+        """Hash the complete .part file and adopt it into the spool (blocking)."""
+        upload_id = upload.id
+        part = self._part_path(upload_id)
+        digest = hashlib.sha256()
+        with part.open("rb") as f:
+            while piece := f.read(_HASH_CHUNK):
+                digest.update(piece)
+        sha256 = digest.hexdigest()
+        if upload.sha256 and upload.sha256 != sha256:
+            self.abort(upload_id)
+            raise HTTPException(status_code=422, detail="SHA-256 mismatch — upload discarded")
+
+        path = file_service.adopt(part, upload.file_name)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        return upload, SpooledUpload(path=path, size=upload.size, sha256=sha256)
+
+    def abort(self, upload_id: str):
+        self._part_path(upload_id).unlink(missing_ok=True)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        self._locks.pop(upload_id, None)
+
+    def purge_expired(self):
+        """Drop uploads that were never finalized within the TTL."""
+        if not self.directory.exists():
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for meta_path in self.directory.glob("*.json"):
+            lock = self._locks.get(meta_path.stem)
+            if lock and lock.locked():
+                # Still receiving data (or being finalized)
+                continue
+            try:
+                expired = meta_path.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if expired:
+                self.abort(meta_path.stem)
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    @contextlib.asynccontextmanager
+    async def _locked(self, upload_id: str, action: str):
+        """Hold the upload's lock; 409 if another request holds it, 404 if unknown.
+
+        The id is validated first so unknown ids never get a lock entry.
+        """
+        self._require(upload_id)
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        if lock.locked():
+            raise HTTPException(status_code=409, detail=f"Another request is {action} this upload")
+        async with lock:
+            yield
+
+    def _require(self, upload_id: str) -> UploadSession:
+        upload = self.get(upload_id)
+        if not upload:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        return upload
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.directory / f"{uuid.UUID(upload_id)}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.directory / f"{uuid.UUID(upload_id)}.json"
+
+
+upload_service = UploadService(
+    directory=settings.DATA_DIR / "uploads",
+    ttl_seconds=settings.INGEST.RESUMABLE_UPLOAD_TTL_HOURS * 3600,
+)
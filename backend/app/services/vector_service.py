@@ -1,7 +1,13 @@
 from app.core.config import settings
+from app.services.chunking_service import Chunk
+from app.services.embedding_cache import embedding_cache
+from app.services.embedding_pool import embedding_pool
+from app.services.near_duplicates import band_keys, distance
+import itertools
 import uuid
-from typing import List, Dict, Any
+from typing import Dict, List, Set
 from qdrant_client import QdrantClient
+from qdrant_client import models
 from qdrant_client.models import Distance, VectorParams, PointStruct
 from fastembed import TextEmbedding
 
@@ -10,7 +16,7 @@ class VectorService:
     _model: TextEmbedding | None = None
 
     def __init__(self):
-        self.client = QdrantClient(host=settings.QDRANT.HOST, port=settings.QDRANT.PORT)
+        self.client = QdrantClient(**settings.QDRANT.client_options)
         self.collection_name = settings.QDRANT.COLLECTION_NAME
 
         if VectorService._model is None:
@@ -33,39 +39,173 @@ class VectorService:
                     distance=Distance.COSINE,
                 ),
             )
-            return
+        else:
+            info = self.client.get_collection(self.collection_name)
+            existing_size = info.config.params.vectors.size
+            if existing_size != self.model.embedding_size:
+                print(
+                    f"\n{'='*60}\n"
+                    f"WARNING: Vector size mismatch!\n"
+                    f"  Collection '{self.collection_name}' has {existing_size}-dim vectors.\n"
+                    f"  Current model '{settings.EMBED_MODEL}' produces {self.model.embedding_size}-dim vectors.\n"
+                    f"  Go to Settings → Storage → Clear Vector DB, then re-upload your documents.\n"
+                    f"{'='*60}\n"
+                )
+
+        if settings.INGEST.DEDUP_ACROSS_DOCUMENTS:
+            # Band lookups in find_near_duplicates() (no-op if it exists)
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="simhash_bands",
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+
+    def embed_chunks(self, chunks: List[Chunk]) -> List[List[float]]:
+        """Embed chunk contents. Uses embed() which adds document prefix for nomic.
+
+        Vectors found in the embedding cache are reused; the rest are computed
+        in EMBEDDING.BATCH_SIZE model batches, spread over the embedding
+        worker processes when EMBEDDING.WORKERS > 1.
+        """
+        texts = [c.content for c in chunks]
+        vectors = embedding_cache.get_many(texts, "document")
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            texts = [texts[i] for i in missing]
+            if embedding_pool.size > 1:
+                fresh = embedding_pool.embed(texts)
+            else:
+                fresh = list(self.model.embed(texts, batch_size=settings.EMBEDDING.BATCH_SIZE))
+            embedding_cache.put_many(texts, fresh, "document")
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+        return [vector.tolist() for vector in vectors]
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed search queries in one model call. Uses query_embed() for the
+        model's query prompt; vectors in the embedding cache are reused."""
+        vectors = embedding_cache.get_many(queries, "query")
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Popular questions often arrive together; embed each once
+            texts = list(dict.fromkeys(queries[i] for i in missing))
+            fresh = dict(zip(texts, self.model.query_embed(texts, batch_size=settings.EMBEDDING.BATCH_SIZE)))
+            embedding_cache.put_many(texts, list(fresh.values()), "query")
+            for i in missing:
+                vectors[i] = fresh[queries[i]]
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.embed_queries([query])[0]
+
+    def upsert_embedded(self, chunks: List[Chunk], embeddings: List[List[float]]):
+        """Upsert chunks whose vectors were already computed by embed_chunks().
+
+        Sent in requests of QDRANT.UPSERT_BATCH points.
+        """
+        for page in itertools.batched(zip(chunks, embeddings), settings.QDRANT.UPSERT_BATCH):
+            points = [
+                PointStruct(id=chunk.id, vector=vector, payload=chunk.to_payload())
+                for chunk, vector in page
+            ]
+            self.client.upsert(collection_name=self.collection_name, points=points)
+        return True
+
+    def get_document_chunks(self, document_id: str) -> Dict[str, dict]:
+        """Return {point_id: metadata} for every chunk already stored for a document."""
+        existing: Dict[str, dict] = {}
+        offset = None
+        while True:
+            results, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=self._document_filter(document_id),
+                limit=1000,
+                offset=offset,
+                with_payload=["metadata"],
+                with_vectors=False,
+            )
+            for point in results:
+                existing[str(point.id)] = point.payload.get("metadata") or {}
+            if next_offset is None:
+                break
+            offset = next_offset
+        return existing
 
-        info = self.client.get_collection(self.collection_name)
-        existing_size = info.config.params.vectors.size
-        if existing_size != self.model.embedding_size:
-            print(
-                f"\n{'='*60}\n"
-                f"WARNING: Vector size mismatch!\n"
-                f"  Collection '{self.collection_name}' has {existing_size}-dim vectors.\n"
-                f"  Current model '{settings.EMBED_MODEL}' produces {self.model.embedding_size}-dim vectors.\n"
-                f"  Go to Settings → Storage → Clear Vector DB, then re-upload your documents.\n"
-                f"{'='*60}\n"
+    def find_near_duplicates(self, chunks: List[Chunk], document_id: str) -> Set[str]:
+        """Ids of chunks that near-duplicate a chunk stored for another document.
+
+        Candidates are found through the ``simhash_bands`` payload and
+        confirmed by Hamming distance; chunks without a SimHash never match.
+        """
+        max_distance = settings.INGEST.DEDUP_MAX_DISTANCE
+        by_band: Dict[str, List[Chunk]] = {}
+        for chunk in chunks:
+            if chunk.simhash is not None:
+                for key in band_keys(chunk.simhash, max_distance):
+                    by_band.setdefault(key, []).append(chunk)
+        duplicates: Set[str] = set()
+        if not by_band:
+            return duplicates
+        candidates = {chunk.id for group in by_band.values() for chunk in group}
+
+        scroll_filter = models.Filter(
+            must=[models.FieldCondition(key="simhash_bands", match=models.MatchAny(any=list(by_band)))],
+            must_not=self._document_filter(document_id).must,
+        )
+        offset = None
+        while True:
+            results, next_offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=scroll_filter,
+                limit=1000,
+                offset=offset,
+                with_payload=["simhash", "simhash_bands"],
+                with_vectors=False,
             )
+            for point in results:
+                stored = int(point.payload["simhash"], 16)
+                for key in point.payload.get("simhash_bands") or ():
+                    for chunk in by_band.get(key, ()):
+                        if distance(chunk.simhash, stored) <= max_distance:
+                            duplicates.add(chunk.id)
+            if next_offset is None or len(duplicates) == len(candidates):
+                break
+            offset = next_offset
+        return duplicates
 
-    def upsert_chunks(self, chunks: List[Dict[str, Any]]):
-        """Embed and upsert chunks. Uses embed() which adds document prefix for nomic."""
-        texts = [c["content"] for c in chunks]
-        embeddings = list(self.model.embed(texts))
-
-        points = [
-            PointStruct(
-                id=chunk["id"],
-                vector=embeddings[i].tolist(),
-                payload={
-                    "content": chunk["content"],
-                    "metadata": chunk["metadata"],
-                },
+    def update_metadata(self, updates: Dict[str, dict]):
+        """Replace the metadata payload of existing points without re-embedding."""
+        if not updates:
+            return
+        operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(payload={"metadata": meta}, points=[point_id])
             )
-            for i, chunk in enumerate(chunks)
+            for point_id, meta in updates.items()
         ]
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=operations,
+        )
 
-        self.client.upsert(collection_name=self.collection_name, points=points)
-        return True
+    def delete_points(self, point_ids: List[str]):
+        if not point_ids:
+            return
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=point_ids),
+        )
+
+    @staticmethod
+    def _document_filter(document_id: str) -> models.Filter:
+        return models.Filter(
+            must=[
+                models.FieldCondition(
+                    key="metadata.document_id",
+                    match=models.MatchValue(value=document_id),
+                )
+            ]
+        )
 
     def get_stats(self) -> dict:
         """Return total chunks and unique document count."""
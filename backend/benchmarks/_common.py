@@ -0,0 +1,51 @@
+"""Shared helpers for the benchmark scripts (run from the backend directory)."""
+
+import json
+import multiprocessing as mp
+import resource
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+# Bundled sample corpus used by several benchmarks
+CORPUS_DIR = Path(__file__).resolve().parents[2] / "reports" / "tests" / "data" / "documents"
+
+
+def _peak_rss_child(conn, fn: Callable[..., Any], args: tuple):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        result = fn(*args)
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+        conn.close()
+        return
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    conn.send({"peak_rss_mb": round(after * scale / 2**20, 1),
+               "peak_rss_delta_mb": round((after - before) * scale / 2**20, 1),
+               "result": result})
+    conn.close()
+
+
+def measure_peak_rss(fn: Callable[..., Any], *args) -> dict:
+    """Run ``fn(*args)`` in a fresh process and report its peak RSS.
+
+    A fresh process keeps one scenario's high-water mark from hiding another's.
+    ``fn`` must be importable (module level) and return something picklable.
+    """
+    ctx = mp.get_context("spawn")
+    parent, child = ctx.Pipe()
+    proc = ctx.Process(target=_peak_rss_child, args=(child, fn, args))
+    proc.start()
+    out = parent.recv()
+    proc.join()
+    return out
+
+
+def emit(results: Any, output: str | None):
+    """Print results as JSON and optionally write them to ``output``."""
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
@@ -0,0 +1,96 @@
+"""
+Memory held per chunk: the previous nested dicts vs slotted ``Chunk`` records.
+
+    cd backend && python -m benchmarks.bench_chunk_memory --rows 200000
+
+Chunks a synthetic CSV (many small row-window chunks) and a synthetic
+Markdown document (many heading sections), keeps every chunk alive the way
+the old list-based pipeline did, and reports the memory those chunk objects
+take on top of their content strings (tracemalloc) plus the peak RSS of the
+whole run. Each scenario runs in a fresh process.
+"""
+
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks._common import emit, measure_peak_rss
+
+
+def _synthetic_csv(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "name": rng.choice(["alpha", "beta", "gamma delta"], rows),
+        "amount": (rng.random(rows) * 1000).round(2),
+    })
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _synthetic_markdown(sections: int) -> str:
+    return "".join(
+        f"## Section {i}\n\nParagraph {i} with a few words of body text.\n\n" for i in range(sections)
+    )
+
+
+def _legacy(chunk) -> dict:
+    """The dict each chunk used to travel as."""
+    return {"content": chunk.content, "metadata": chunk.metadata, "id": chunk.id}
+
+
+def run(kind: str, source: str, size: int) -> dict:
+    from app.services.chunking_service import chunking_service
+
+    if source == "csv":
+        data = chunking_service.load_table(_synthetic_csv(size), "csv")
+        file_name, file_type = "synthetic.csv", "csv"
+    else:
+        data = _synthetic_markdown(size)
+        file_name, file_type = "synthetic.md", "text"
+    # Materialize the content strings first; they are the same in both forms
+    chunks = chunking_service.split_content(data, file_name, "bench-document", file_type)
+    content_bytes = sum(len(c.content.encode("utf-8")) for c in chunks)
+
+    tracemalloc.start()
+    if kind == "dict":
+        records = [_legacy(c) for c in chunks]
+    else:
+        # Fresh records (and per-chunk extras), so both forms are measured
+        # from the same starting point; the DocumentInfo stays shared
+        records = [
+            type(c)(c.content, c.document, c.index, c.token_count, c.extra and dict(c.extra), c.id, c.digest)
+            for c in chunks
+        ]
+    del chunks
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "chunks": len(records),
+        "content_mb": round(content_bytes / 2**20, 1),
+        "records_mb": round(held / 2**20, 1),
+        "bytes_per_chunk": round(held / max(len(records), 1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows in the synthetic CSV")
+    parser.add_argument("--sections", type=int, default=100_000, help="sections in the synthetic Markdown file")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for source, size in (("csv", args.rows), ("markdown", args.sections)):
+        for kind in ("dict", "chunk"):
+            out = measure_peak_rss(run, kind, source, size)
+            if "error" in out:
+                raise SystemExit(f"{source}/{kind}: {out['error']}")
+            results.append({"input": source, "size": size, "representation": kind,
+                            **out["result"], "peak_rss_mb": out["peak_rss_mb"]})
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Chunking throughput and chunk-size distribution per strategy.
+
+    cd backend && python -m benchmarks.bench_chunking --scale 20 --output chunking.json
+
+Runs every ChunkingService strategy over the sample corpus: docling (PDF,
+DOCX, PPTX, images), headings (Markdown / text), code, csv, xlsx and json,
+plus the streaming variants xlsx-stream and json-stream. Each non-Docling
+file is also scaled up ``--scale`` times into a synthetic input: text
+repeated, CSV / XLSX rows repeated, JSON wrapped in an array of copies.
+
+Docling files are converted once up front and only their chunking is timed.
+Every case runs in a fresh process; parsing the input (or streaming it) is
+part of the timed work. The report covers chunks/sec, MB/sec, chunk sizes in
+chars and tokens (min / p50 / p90 / p99 / max / mean), chunks over the token
+budget, and peak RSS. Diff the ``--output`` JSON between releases.
+"""
+
+import argparse
+import importlib.metadata
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.chunking_service import ChunkingService, chunking_service
+from app.services.conversion_pool import ConversionError, conversion_pool
+from app.services.file_service import _DOCLING_EXTENSIONS, file_service
+from benchmarks._common import CORPUS_DIR, emit, measure_peak_rss
+
+STRATEGIES = ["docling", "headings", "code", "csv", "xlsx", "xlsx-stream", "json", "json-stream"]
+
+
+# Strategies run for each file_type assigned by FileService.process_file()
+_STRATEGIES_BY_TYPE = {
+    "docling": ["docling"],
+    "text": ["headings"],
+    "code": ["code"],
+    "csv": ["csv"],
+    "xlsx": ["xlsx", "xlsx-stream"],
+    "json": ["json", "json-stream"],
+}
+
+
+def _file_type(path: Path) -> str:
+    """The file_type ingestion would assign, without converting anything."""
+    if path.name.endswith(".docling.json") or path.suffix.lower() in _DOCLING_EXTENSIONS:
+        return "docling"
+    return file_service.process_file(path, path.name, "")[1]
+
+
+# ── Input preparation ─────────────────────────────────────────────────────────
+
+def _scale_up(path: Path, factor: int, out_dir: Path) -> Path:
+    """Write a synthetic input holding ``factor`` copies of the file's content."""
+    target = out_dir / f"x{factor}_{path.name}"
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        header, _, body = path.read_text(encoding="utf-8").partition("\n")
+        body = body if body.endswith("\n") else body + "\n"
+        target.write_text(header + "\n" + body * factor, encoding="utf-8")
+    elif ext == ".xlsx":
+        sheets = pd.read_excel(path, sheet_name=None)
+        with pd.ExcelWriter(target, engine="openpyxl") as writer:
+            for name, df in sheets.items():
+                pd.concat([df] * factor, ignore_index=True).to_excel(writer, sheet_name=name, index=False)
+    elif ext == ".json":
+        data = json.loads(path.read_bytes())
+        target.write_text(json.dumps({"items": [data] * factor}), encoding="utf-8")
+    else:
+        text = path.read_text(encoding="utf-8", errors="ignore")
+        target.write_text("\n".join([text] * factor), encoding="utf-8")
+    return target
+
+
+def _convert(path: Path, out_dir: Path) -> Path:
+    """Convert a Docling input once and save it, so cases only time chunking."""
+    profile = file_service.conversion_profile(path.name)
+    doc = conversion_pool.convert(path, profile)
+    target = out_dir / f"{path.name}.docling.json"
+    doc.save_as_json(target)
+    return target
+
+
+# ── One case (runs in a fresh process) ────────────────────────────────────────
+
+def _load(path: Path, strategy: str):
+    """Parse the input the way the ingestion pipeline does; returns (data, file_type, name)."""
+    if strategy == "docling":
+        from docling_core.types.doc.document import DoclingDocument
+
+        name = path.name.removesuffix(".docling.json")
+        return DoclingDocument.load_from_json(path), "docling", name
+    if strategy in ("csv", "xlsx"):
+        return chunking_service.load_table(path, strategy), strategy, path.name
+    if strategy == "xlsx-stream":
+        return chunking_service.stream_xlsx(path), "xlsx", path.name
+    if strategy == "json":
+        return chunking_service.load_json(path), "json", path.name
+    if strategy == "json-stream":
+        return chunking_service.stream_json(path), "json", path.name
+    return ChunkingService.read_text(path), "code" if strategy == "code" else "text", path.name
+
+
+def _distribution(values: np.ndarray) -> dict:
+    if not len(values):
+        return {}
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        "min": int(values.min()),
+        "p50": int(p50),
+        "p90": int(p90),
+        "p99": int(p99),
+        "max": int(values.max()),
+        "mean": round(float(values.mean()), 1),
+    }
+
+
+def run_case(path: str, strategy: str) -> dict:
+    path = Path(path)
+    chars: list[int] = []
+    tokens: list[int] = []
+    started = time.perf_counter()
+    data, file_type, name = _load(path, strategy)
+    # Only sizes are kept, so peak memory reflects chunking, not the results
+    for chunk in chunking_service.iter_chunks(data, name, "bench-document", file_type):
+        chars.append(len(chunk.content))
+        tokens.append(chunk.token_count)
+    seconds = time.perf_counter() - started
+
+    size_mb = path.stat().st_size / 2**20
+    token_counts = np.array(tokens)
+    return {
+        "chunks": len(chars),
+        "seconds": round(seconds, 4),
+        "chunks_per_sec": round(len(chars) / seconds, 1) if seconds else None,
+        "mb_per_sec": round(size_mb / seconds, 3) if seconds else None,
+        "chars": _distribution(np.array(chars)),
+        "tokens": _distribution(token_counts),
+        "over_budget": int((token_counts > ChunkingService.MAX_TOKENS).sum()),
+    }
+
+
+def _environment() -> dict:
+    def version(package: str) -> str | None:
+        try:
+            return importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            return None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "docling": version("docling"),
+        "docling_core": version("docling-core"),
+        "chunk_tokenizer": settings.CHUNK_TOKENIZER,
+        "max_tokens": ChunkingService.MAX_TOKENS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_DIR, help="directory of input documents")
+    parser.add_argument("--scale", type=int, default=20, help="copies per synthetic input (0 disables them)")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    files = sorted(
+        p for p in args.corpus.iterdir()
+        if p.is_file() and not file_service.unsupported_reason(p.name, 0)
+    )
+    results = []
+    with tempfile.TemporaryDirectory(prefix="docrag_bench_") as tmp:
+        work_dir = Path(tmp)
+        cases: list[tuple[str, Path, bool]] = []
+        docling_files = [p for p in files if _file_type(p) == "docling"]
+        if "docling" in args.strategies and docling_files:
+            conversion_pool.start()
+            try:
+                for path in docling_files:
+                    try:
+                        cases.append((path.name, _convert(path, work_dir), False))
+                    except ConversionError as e:
+                        results.append({"input": path.name, "strategy": "docling", "error": str(e)})
+            finally:
+                conversion_pool.shutdown()
+        for path in files:
+            if _file_type(path) == "docling":
+                continue
+            cases.append((path.name, path, False))
+            if args.scale > 1:
+                cases.append((f"{path.name} x{args.scale}", _scale_up(path, args.scale, work_dir), True))
+
+        for label, path, synthetic in cases:
+            for strategy in _STRATEGIES_BY_TYPE[_file_type(path)]:
+                if strategy not in args.strategies:
+                    continue
+                out = measure_peak_rss(run_case, str(path), strategy)
+                entry = {
+                    "input": label,
+                    "strategy": strategy,
+                    "synthetic": synthetic,
+                    "input_mb": round(path.stat().st_size / 2**20, 3),
+                }
+                if "error" in out:
+                    entry["error"] = out["error"]
+                else:
+                    entry.update(out["result"])
+                    entry["peak_rss_mb"] = out["peak_rss_mb"]
+                    entry["peak_rss_delta_mb"] = out["peak_rss_delta_mb"]
+                results.append(entry)
+                print(f"{label:45} {strategy:12} {entry.get('chunks_per_sec')} chunks/s", file=sys.stderr)
+
+    emit({"environment": _environment(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
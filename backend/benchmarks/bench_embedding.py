@@ -0,0 +1,121 @@
+"""
+Document embedding throughput: chunks/sec vs worker processes and batch size.
+
+    cd backend && python -m benchmarks.bench_embedding --chunks 4096 --output embedding.json
+
+Embeds real chunks of the sample corpus (text, code, CSV and JSON files,
+repeated up to ``--chunks``) with EMBED_MODEL, first in-process the way
+EMBEDDING__WORKERS=1 does, then through an EmbeddingPool of 1, 2, 4, …
+workers up to the core count, for every ``--batch-sizes`` value. Each case
+runs in a fresh process and loads its models before the timed run. Peak RSS
+is the benchmark process only; every pool worker holds its own copy of the
+model on top of that.
+"""
+
+import argparse
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from benchmarks._common import CORPUS_DIR, emit, measure_peak_rss
+
+
+def _corpus_texts(corpus: Path, count: int) -> list[str]:
+    """``count`` chunk contents from the corpus's non-Docling files, repeated as needed."""
+    from app.services.chunking_service import ChunkingService, chunking_service
+    from app.services.file_service import _DOCLING_EXTENSIONS, file_service
+
+    texts: list[str] = []
+    for path in sorted(p for p in corpus.iterdir() if p.is_file()):
+        if path.suffix.lower() in _DOCLING_EXTENSIONS or file_service.unsupported_reason(path.name, 0):
+            continue
+        file_type = file_service.process_file(path, path.name, "")[1]
+        if file_type in ("csv", "xlsx"):
+            data = chunking_service.load_table(path, file_type)
+        elif file_type == "json":
+            data = chunking_service.load_json(path)
+        else:
+            data = ChunkingService.read_text(path)
+        texts.extend(c.content for c in chunking_service.iter_chunks(data, path.name, "bench-document", file_type))
+    if not texts:
+        raise SystemExit(f"No chunkable files in {corpus}")
+    return (texts * (count // len(texts) + 1))[:count]
+
+
+def run_case(texts: list[str], workers: int, batch_size: int) -> dict:
+    """Embed ``texts`` in-process (workers=0) or through a pool of ``workers``."""
+    if workers:
+        from app.services.embedding_pool import EmbeddingPool
+
+        pool = EmbeddingPool(settings.EMBED_MODEL, workers, batch_size)
+        embed = pool.embed
+    else:
+        from fastembed import TextEmbedding
+
+        model = TextEmbedding(model_name=settings.EMBED_MODEL)
+        embed = lambda batch: list(model.embed(batch, batch_size=batch_size))  # noqa: E731
+    try:
+        # Load the model(s): one slice per worker
+        embed(texts[: max(workers, 1) * batch_size])
+        started = time.perf_counter()
+        vectors = embed(texts)
+        seconds = time.perf_counter() - started
+    finally:
+        if workers:
+            pool.shutdown()
+    return {
+        "chunks": len(vectors),
+        "seconds": round(seconds, 3),
+        "chunks_per_sec": round(len(vectors) / seconds, 1),
+    }
+
+
+def _worker_counts(limit: int) -> list[int]:
+    counts, n = [], 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    return counts + [limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, default=CORPUS_DIR, help="directory of input documents")
+    parser.add_argument("--chunks", type=int, default=4096, help="chunks embedded per case")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    texts = _corpus_texts(args.corpus, args.chunks)
+    results = []
+    for batch_size in args.batch_sizes:
+        baseline = None
+        for workers in [0, *_worker_counts(args.max_workers)]:
+            out = measure_peak_rss(run_case, texts, workers, batch_size)
+            entry = {"mode": "pool" if workers else "in-process", "workers": workers or 1, "batch_size": batch_size}
+            if "error" in out:
+                entry["error"] = out["error"]
+            else:
+                entry.update(out["result"], peak_rss_mb=out["peak_rss_mb"])
+                baseline = baseline or entry["chunks_per_sec"]
+                entry["speedup"] = round(entry["chunks_per_sec"] / baseline, 2)
+            results.append(entry)
+            print(f"batch {batch_size:4} {entry['mode']:10} x{entry['workers']:<3} "
+                  f"{entry.get('chunks_per_sec')} chunks/s", file=sys.stderr)
+
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "embed_model": settings.EMBED_MODEL,
+        "mean_chunk_chars": round(sum(map(len, texts)) / len(texts), 1),
+    }
+    emit({"environment": environment, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Search latency under concurrent requests: blocking vs async Qdrant access.
+
+    cd backend && python -m benchmarks.bench_search_concurrency --concurrency 50 --output search.json
+
+Fires ``--concurrency`` searches at once on one event loop, ``--rounds``
+times, the way simultaneous chat requests hit RetrievalService.search():
+
+- blocking: the previous code path; the sync QdrantClient and query
+  embedding run inline in the coroutine, so requests queue behind each other
+  on the event loop
+- async: RetrievalService.search() as it is now (AsyncQdrantClient, query
+  embeddings micro-batched on their own thread)
+
+Both run over REST and, with ``--grpc``, over gRPC as well. Reports per-request
+latency (p50 / p95 / p99 / max), requests/sec and the worst event-loop stall
+seen by a 10 ms ticker. Needs a running Qdrant with the configured collection
+(ideally indexed) and the embedding model. Every query is unique, also
+across runs (a per-run nonce), so neither the in-memory query cache nor the
+persistent embedding cache hides the model cost.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.core.config import settings
+from app.services.retrieval_service import RetrievalService
+from app.services.vector_service import vector_service
+from benchmarks._common import emit
+
+_QUERIES = [
+    "What does the document say about pricing?",
+    "Summarize the main findings",
+    "Which sections mention security requirements?",
+    "How is the data pipeline configured?",
+    "List the open issues and their owners",
+]
+
+_TICK = 0.01
+
+# Makes this run's queries miss the on-disk embedding cache filled by earlier runs
+_NONCE = uuid.uuid4().hex[:8]
+
+
+def _blocking_search(client: QdrantClient):
+    async def search(query: str, limit: int = 5, min_score: float = 0.3):
+        vector = vector_service.embed_query(query)
+        return client.query_points(
+            collection_name=settings.QDRANT.COLLECTION_NAME,
+            query=vector,
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+            score_threshold=min_score,
+        ).points
+    return search
+
+
+async def _ticker(stop: asyncio.Event) -> float:
+    """Largest delay between scheduled and actual wake-up of the event loop."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(_TICK)
+        worst = max(worst, time.perf_counter() - started - _TICK)
+    return worst
+
+
+async def _run(search, concurrency: int, rounds: int, label: str) -> dict:
+    latencies: list[float] = []
+
+    async def one(i: int, submitted: float):
+        # Measured from submission: a blocked request waits before it starts
+        await search(f"{_QUERIES[i % len(_QUERIES)]} ({label} #{i} {_NONCE})")
+        latencies.append(time.perf_counter() - submitted)
+
+    await search(f"warm-up {label} {_NONCE}")
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop))
+    started = time.perf_counter()
+    for r in range(rounds):
+        submitted = time.perf_counter()
+        await asyncio.gather(*(one(r * concurrency + i, submitted) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    stall = await ticker
+
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(float(p50), 1),
+            "p95": round(float(p95), 1),
+            "p99": round(float(p99), 1),
+            "max": round(float(ms.max()), 1),
+        },
+        "max_loop_stall_ms": round(stall * 1000, 1),
+    }
+
+
+async def _main(args) -> list[dict]:
+    results = []
+    for grpc in ([False, True] if args.grpc else [False]):
+        options = {**settings.QDRANT.client_options, "prefer_grpc": grpc}
+        transport = "grpc" if grpc else "rest"
+
+        sync_client = QdrantClient(**options)
+        out = await _run(_blocking_search(sync_client), args.concurrency, args.rounds, f"blocking-{transport}")
+        sync_client.close()
+        results.append({"mode": "blocking", "transport": transport, **out})
+        print(f"blocking {transport:4} p95 {out['latency_ms']['p95']} ms", file=sys.stderr)
+
+        service = RetrievalService(AsyncQdrantClient(**options))
+        out = await _run(service.search, args.concurrency, args.rounds, f"async-{transport}")
+        await service.close()
+        results.append({"mode": "async", "transport": transport, **out})
+        print(f"async    {transport:4} p95 {out['latency_ms']['p95']} ms", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=50, help="searches in flight at once")
+    parser.add_argument("--rounds", type=int, default=5, help="batches of concurrent searches")
+    parser.add_argument("--grpc", action="store_true", help="also measure over gRPC")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    points = vector_service.client.count(settings.QDRANT.COLLECTION_NAME).count
+    results = asyncio.run(_main(args))
+    emit({
+        "collection": settings.QDRANT.COLLECTION_NAME,
+        "points": points,
+        "concurrency": args.concurrency,
+        "results": results,
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
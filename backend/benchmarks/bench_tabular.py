@@ -0,0 +1,93 @@
+"""
+CSV / XLSX → text: ``df.iterrows()`` vs column-vectorized conversion.
+
+    cd backend && python -m benchmarks.bench_tabular --rows 200000
+
+Runs both implementations on every CSV / XLSX in the sample corpus plus a
+synthetic CSV of ``--rows`` rows (ints, floats, text with gaps, dates) and
+fails if their output differs anywhere.
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.chunking_service import ChunkingService
+from benchmarks._common import CORPUS_DIR, emit
+
+
+def legacy(df: pd.DataFrame) -> list[str]:
+    """The previous row-by-row implementation."""
+    rows = []
+    for _, row in df.iterrows():
+        parts = [f"{col}: {val}" for col, val in row.items() if str(val) != ""]
+        if parts:
+            rows.append(", ".join(parts))
+    return rows
+
+
+def vectorized(df: pd.DataFrame) -> list[str]:
+    """The chunking service's row rendering, skipping empty rows like legacy()."""
+    return [line for line in ChunkingService._row_texts(df) if line]
+
+
+def _synthetic_csv(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "name": rng.choice(["alpha", "beta", "gamma delta", None], rows),
+        "amount": np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows) * 1000),
+        "quantity": rng.integers(0, 500, rows),
+        "date": pd.date_range("2020-01-01", periods=rows, freq="min").strftime("%Y-%m-%d %H:%M"),
+    })
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def _frames(rows: int):
+    """Yield (label, DataFrame) prepared exactly like the chunking service does."""
+    for path in sorted(CORPUS_DIR.glob("*.csv")):
+        yield path.name, pd.read_csv(path).fillna("")
+    for path in sorted(CORPUS_DIR.glob("*.xlsx")):
+        for sheet, df in pd.read_excel(path, sheet_name=None).items():
+            yield f"{path.name}[{sheet}]", df.fillna("")
+    yield f"synthetic_{rows}_rows.csv", pd.read_csv(io.BytesIO(_synthetic_csv(rows))).fillna("")
+
+
+def _timed(fn, df: pd.DataFrame) -> tuple[list[str], float]:
+    started = time.perf_counter()
+    out = fn(df)
+    return out, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows in the synthetic CSV")
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = []
+    mismatches = []
+    for label, df in _frames(args.rows):
+        old, old_s = _timed(legacy, df)
+        new, new_s = _timed(vectorized, df)
+        if old != new:
+            mismatches.append(label)
+        results.append({
+            "input": label,
+            "rows": len(df),
+            "columns": len(df.columns),
+            "iterrows_s": round(old_s, 4),
+            "vectorized_s": round(new_s, 4),
+            "speedup": round(old_s / new_s, 1) if new_s else None,
+            "identical": old == new,
+        })
+    emit(results, args.output)
+    if mismatches:
+        raise SystemExit(f"Output differs for: {', '.join(mismatches)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Peak RSS per upload: whole-file ``await file.read()`` vs streamed spooling.
+
+    cd backend && python -m benchmarks.bench_upload_memory --size-mb 5 15
+
+"legacy" mirrors the old path: read the whole body into memory, write a
+second copy to a temp file (Docling path) or decode a string copy (text path).
+"spooled" streams the body to disk once via FileService.spool_upload and reads
+text straight from that file.
+"""
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+from starlette.datastructures import UploadFile
+
+from app.services.chunking_service import ChunkingService
+from app.services.file_service import file_service
+from benchmarks._common import emit, measure_peak_rss
+
+
+def _make_upload(size_mb: int, suffix: str) -> UploadFile:
+    # Starlette spools request bodies above 1 MB to disk; mimic that here
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    line = b"lorem ipsum dolor sit amet, consectetur adipiscing elit\n"
+    written = 0
+    while written < size_mb * 2**20:
+        spooled.write(line * 1024)
+        written += len(line) * 1024
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename=f"bench{suffix}", size=written)
+
+
+def legacy(size_mb: int, suffix: str) -> int:
+    async def run():
+        file = _make_upload(size_mb, suffix)
+        content = await file.read()
+        if suffix == ".pdf":
+            tmp = Path(tempfile.gettempdir()) / "docrag_bench_legacy.pdf"
+            tmp.write_bytes(content)
+            tmp.unlink()
+            return len(content)
+        text = content.decode("utf-8", errors="ignore")
+        return len(text)
+    return asyncio.run(run())
+
+
+def spooled(size_mb: int, suffix: str) -> int:
+    async def run():
+        file = _make_upload(size_mb, suffix)
+        upload = await file_service.spool_upload(file)
+        try:
+            if suffix == ".pdf":
+                return upload.size
+            return len(ChunkingService.read_text(upload.path))
+        finally:
+            upload.path.unlink(missing_ok=True)
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, nargs="+", default=[15])
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for size_mb in args.size_mb:
+        for suffix in (".txt", ".pdf"):
+            for name, fn in (("legacy", legacy), ("spooled", spooled)):
+                measured = measure_peak_rss(fn, size_mb, suffix)
+                results.append({
+                    "mode": name,
+                    "kind": "text" if suffix == ".txt" else "docling",
+                    "size_mb": size_mb,
+                    "peak_rss_mb": measured["peak_rss_mb"],
+                    "peak_rss_delta_mb": measured["peak_rss_delta_mb"],
+                })
+    emit(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import io
+import json
+import math
+
+import pytest
+
+from app.services import json_stream
+from app.services.json_stream import DuplicateKeyError, flatten_json, iter_json_leaves
+
+VALID = [
+    "0",
+    "-0",
+    "12",
+    "-12",
+    "1.5",
+    "-0.25",
+    "1e5",
+    "1E+5",
+    "2.5e-3",
+    "123456789012345678901234567890",
+    '"plain"',
+    r'"esc\"aped \\ \/ \n é 😀"',
+    "true",
+    "false",
+    "null",
+    "Infinity",
+    "-Infinity",
+    "[]",
+    "{}",
+    "[[], {}, [[]], {\"a\": {}}]",
+    ' { "a" : [ 1 , 2.0 , { "b" : null } ] , "c" : "d" } ',
+    '{"a": {"b": {"c": [true, false, -1e-2]}}, "": 0, "x y": "z"}',
+    '[{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}]',
+    "[" * 200 + "1" + "]" * 200,
+    '{"k": ' * 200 + "1" + "}" * 200,
+]
+
+INVALID = [
+    "",
+    "   ",
+    "01",
+    "-01",
+    "1.",
+    ".5",
+    "-",
+    "+1",
+    "1e",
+    "1e+-2",
+    "1.e5",
+    "0x10",
+    "-NaN",
+    "infinity",
+    "True",
+    "[1 2]",
+    "[1,]",
+    '{"a": 1,}',
+    '{"a" 1}',
+    "{1: 2}",
+    "[1]]",
+    "[1] 2",
+    '"unterminated',
+    '"bad \\x escape"',
+    '"tab\tinside"',
+    "[01]",
+    '{"a": 1.}',
+]
+
+
+def _stream(text: str) -> list:
+    return list(iter_json_leaves(io.StringIO(text)))
+
+
+@pytest.fixture(params=[json_stream._BLOCK, 1, 3])
+def block(request, monkeypatch):
+    """Also read in tiny blocks, so tokens straddle block boundaries."""
+    monkeypatch.setattr(json_stream, "_BLOCK", request.param)
+
+
+@pytest.mark.parametrize("text", VALID)
+def test_matches_json_loads(text, block):
+    assert _stream(text) == list(flatten_json(json.loads(text)))
+
+
+@pytest.mark.parametrize("text", VALID)
+def test_scalar_types_match_json_loads(text, block):
+    expected = [type(value) for *_, value in flatten_json(json.loads(text))]
+    assert [type(value) for *_, value in _stream(text)] == expected
+
+
+def test_nan(block):
+    [(_, _, value)] = _stream("NaN")
+    assert math.isnan(value)
+
+
+@pytest.mark.parametrize("text", INVALID)
+def test_rejects_what_json_loads_rejects(text, block):
+    with pytest.raises(ValueError):
+        json.loads(text)
+    with pytest.raises(ValueError):
+        _stream(text)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1, "a": 2}', '[{"x": {"a": 1}, "y": 0, "x": 2}]'])
+def test_duplicate_keys_raise(text, block):
+    with pytest.raises(DuplicateKeyError):
+        _stream(text)
+
+
+def test_same_key_in_sibling_objects_is_not_a_duplicate(block):
+    text = '[{"a": 1}, {"a": 2}, {"b": {"a": 3}, "a": 4}]'
+    assert _stream(text) == list(flatten_json(json.loads(text)))
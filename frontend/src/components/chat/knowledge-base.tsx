@@ -1,7 +1,7 @@
 "use client";
 
 import { useEffect, useRef, useState } from "react";
-import { apiRequest, apiUploadWithProgress } from "@/lib/api";
+import { apiRequest, apiResumableUpload, apiUploadWithProgress } from "@/lib/api";
 import {
   Table,
   TableBody,
@@ -55,10 +55,38 @@ interface Document {
   file_name: string;
 }
 
+interface IngestJob {
+  job_id: string;
+  status: "queued" | "running" | "completed" | "failed";
+  stage: string;
+  progress: number;
+  error?: string | null;
+}
+
+/** A file as sent to and returned by POST /ingest/negotiate. */
+interface NegotiatedFile {
+  file_name: string;
+  size: number;
+  sha256: string;
+  source_path?: string | null;
+  reason?: string;
+}
+
+interface NegotiatePlan {
+  needed: NegotiatedFile[];
+  indexed: NegotiatedFile[];
+  duplicates: NegotiatedFile[];
+  rejected: NegotiatedFile[];
+}
+
 interface UploadItem {
   id: string;
   file: File;
-  status: "pending" | "uploading" | "processing" | "done" | "error";
+  // Path inside a picked or dropped folder; identifies the document on re-upload
+  sourcePath?: string;
+  // Content hash from negotiation; null when not hashed (large file, no WebCrypto)
+  sha256?: string | null;
+  status: "checking" | "pending" | "uploading" | "processing" | "done" | "error";
   progress: number;
   error?: string;
 }
@@ -67,7 +95,12 @@ interface UploadItem {
 // Constants
 // ---------------------------------------------------------------------------
 
-const MAX_FILE_SIZE = 20 * 1024 * 1024; // 20 MB — matches backend limit
+// Files above this go through the resumable upload protocol
+const SINGLE_UPLOAD_LIMIT = 20 * 1024 * 1024; // 20 MB — matches backend limit
+const MAX_FILE_SIZE = 2048 * 1024 * 1024; // 2 GB — backend resumable limit
+
+/** How often to poll a background ingestion job for its status. */
+const JOB_POLL_INTERVAL_MS = 1000;
 
 /**
  * All extensions accepted by the backend.
@@ -153,15 +186,27 @@ async function readAllDirEntries(reader: FileSystemDirectoryReader): Promise<Fil
   return all;
 }
 
-/** Recursively collect File objects from a FileSystemEntry (file or directory). */
-async function collectFilesFromEntry(entry: FileSystemEntry): Promise<File[]> {
+/** A file to upload plus its path inside a picked or dropped folder, if any. */
+interface PickedFile {
+  file: File;
+  sourcePath?: string;
+}
+
+/**
+ * Recursively collect files from a FileSystemEntry (file or directory).
+ * Dropped files have no webkitRelativePath, so the path comes from the entry;
+ * a file dropped on its own has no folder path and is sent without one.
+ */
+async function collectFilesFromEntry(entry: FileSystemEntry): Promise<PickedFile[]> {
   // Skip hidden files / directories (e.g. .DS_Store, .git)
   if (entry.name.startsWith(".")) return [];
 
   if (entry.isFile) {
+    const path = entry.fullPath.replace(/^\/+/, "");
+    const sourcePath = path.includes("/") ? path : undefined;
     return new Promise((resolve) =>
       (entry as FileSystemFileEntry).file(
-        (f) => resolve([f]),
+        (f) => resolve([{ file: f, sourcePath }]),
         () => resolve([]),
       ),
     );
@@ -178,7 +223,7 @@ async function collectFilesFromEntry(entry: FileSystemEntry): Promise<File[]> {
 }
 
 /** Collect all files from a DataTransfer, handling directories recursively. */
-async function collectFilesFromDataTransfer(items: DataTransferItemList): Promise<File[]> {
+async function collectFilesFromDataTransfer(items: DataTransferItemList): Promise<PickedFile[]> {
   const entries: FileSystemEntry[] = [];
   for (let i = 0; i < items.length; i++) {
     const entry = items[i].webkitGetAsEntry();
@@ -188,6 +233,16 @@ async function collectFilesFromDataTransfer(items: DataTransferItemList): Promis
   return arrays.flat();
 }
 
+/**
+ * Hex SHA-256 of a file, or null where WebCrypto is unavailable
+ * (non-secure contexts) — callers then simply upload without negotiating.
+ */
+async function sha256Hex(file: File): Promise<string | null> {
+  if (!globalThis.crypto?.subtle) return null;
+  const digest = await crypto.subtle.digest("SHA-256", await file.arrayBuffer());
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
 // ---------------------------------------------------------------------------
 // Component
 // ---------------------------------------------------------------------------
@@ -242,13 +297,43 @@ export function KnowledgeBase() {
    */
   const uploadOne = async (item: UploadItem) => {
     try {
-      const formData = new FormData();
-      formData.append("file", item.file);
+      const { sourcePath, sha256 = null } = item;
 
-      await apiUploadWithProgress("/ingest/upload", formData, (percent) => {
+      const onProgress = (percent: number) => {
         updateItem(item.id, { progress: percent });
         if (percent === 100) updateItem(item.id, { status: "processing" });
-      });
+      };
+
+      let job_id: string | null;
+      if (item.file.size > SINGLE_UPLOAD_LIMIT) {
+        ({ job_id } = await apiResumableUpload<{ job_id: string | null }>(
+          item.file,
+          onProgress,
+          { sha256, sourcePath },
+        ));
+      } else {
+        const formData = new FormData();
+        formData.append("file", item.file);
+        // Folder uploads: the relative path keeps same-named files apart and
+        // lets re-uploads update the existing document instead of duplicating it.
+        // Without one the backend creates a new document.
+        if (sourcePath) formData.append("source_path", sourcePath);
+
+        ({ job_id } = await apiUploadWithProgress<{ job_id: string | null }>(
+          "/ingest/upload",
+          formData,
+          onProgress,
+        ));
+      }
+
+      // The backend ingests in the background — wait for the job to finish.
+      // No job means the identical file was already indexed (dedup hit).
+      while (job_id) {
+        const job = await apiRequest<IngestJob>(`/ingest/jobs/${job_id}`);
+        if (job.status === "completed") break;
+        if (job.status === "failed") throw new Error(job.error || "Ingestion failed");
+        await new Promise((r) => setTimeout(r, JOB_POLL_INTERVAL_MS));
+      }
 
       updateItem(item.id, { status: "done", progress: 100 });
     } catch (err) {
@@ -310,29 +395,91 @@ export function KnowledgeBase() {
     }
 
     setTimeout(() => {
-      claimedIds.current.clear();
-      queueRef.current = [];
-      setUploadQueue([]);
+      // Keep a selection that is still being negotiated
+      const next = queueRef.current.filter((i) => i.status === "checking" || i.status === "pending");
+      if (next.length === 0) claimedIds.current.clear();
+      queueRef.current = next;
+      setUploadQueue(next);
       if (fileInputRef.current) fileInputRef.current.value = "";
     }, 1500);
 
     isQueueRunning.current = false;
+    // Items that finished negotiating while this run was wrapping up
+    if (queueRef.current.some((i) => i.status === "pending")) runQueue();
   };
 
-  const enqueueFiles = (files: File[]) => {
+  /**
+   * Ask the backend once per selection which files it actually needs.
+   * Content that is already indexed is marked done and unsupported files fail
+   * with the server's reason, neither is transferred; the rest become pending.
+   */
+  const negotiate = async (items: UploadItem[]) => {
+    // Hashing reads the whole file into memory — skip it for large files
+    const hashed = await Promise.all(
+      items.map(async (item) => ({
+        item,
+        sha256: item.file.size <= SINGLE_UPLOAD_LIMIT ? await sha256Hex(item.file) : null,
+      })),
+    );
+    const candidates = hashed.filter(({ sha256 }) => sha256);
+    const outcome = new Map<string, Partial<UploadItem>>();
+
+    if (candidates.length > 0) {
+      try {
+        const plan = await apiRequest<NegotiatePlan>("/ingest/negotiate", {
+          method: "POST",
+          body: JSON.stringify({
+            files: candidates.map(({ item, sha256 }) => ({
+              file_name: item.file.name,
+              size: item.file.size,
+              sha256,
+              source_path: item.sourcePath,
+            })),
+          }),
+        });
+        // Entries come back as sent, without ids; identical ones are interchangeable
+        const key = (f: { file_name: string; size: number; sha256: string; source_path?: string | null }) =>
+          [f.file_name, f.size, f.sha256, f.source_path ?? ""].join("\0");
+        const byKey = new Map<string, UploadItem[]>();
+        for (const { item, sha256 } of candidates) {
+          const k = key({ file_name: item.file.name, size: item.file.size, sha256: sha256!, source_path: item.sourcePath });
+          byKey.set(k, [...(byKey.get(k) ?? []), item]);
+        }
+        const settle = (files: NegotiatedFile[], patch: (f: NegotiatedFile) => Partial<UploadItem>) => {
+          for (const f of files) {
+            const item = byKey.get(key(f))?.shift();
+            if (item) outcome.set(item.id, patch(f));
+          }
+        };
+        // Duplicates share content and path with another file of this selection
+        settle([...plan.indexed, ...plan.duplicates], () => ({ status: "done", progress: 100 }));
+        settle(plan.rejected, (f) => ({ status: "error", error: f.reason ?? "Rejected" }));
+      } catch (error) {
+        // Not fatal: the files are simply uploaded without negotiating
+        console.error("Upload negotiation failed", error);
+      }
+    }
+
+    for (const { item, sha256 } of hashed) {
+      updateItem(item.id, { sha256, status: "pending", ...outcome.get(item.id) });
+    }
+  };
+
+  const enqueueFiles = (files: PickedFile[]) => {
     const validItems: UploadItem[] = [];
 
-    for (const file of files) {
+    for (const { file, sourcePath } of files) {
       if (file.size > MAX_FILE_SIZE) {
         toast.error(
-          `${file.name} is too large — max 20 MB (got ${(file.size / 1024 / 1024).toFixed(1)} MB)`,
+          `${file.name} is too large — max 2 GB (got ${(file.size / 1024 / 1024).toFixed(1)} MB)`,
         );
         continue;
       }
       validItems.push({
         id: `${Date.now()}-${Math.random()}`,
         file,
-        status: "pending",
+        sourcePath,
+        status: "checking",
         progress: 0,
       });
     }
@@ -346,21 +493,24 @@ export function KnowledgeBase() {
     queueRef.current = next;
     setUploadQueue(next);
 
-    // If the queue is already running it will pick up new pending items
-    // in the next while-loop iteration. Otherwise start it.
-    if (!isQueueRunning.current) {
-      runQueue();
-    }
+    // Once negotiated, a running queue picks the new pending items up in its
+    // next while-loop iteration. Otherwise start it.
+    negotiate(validItems).then(() => {
+      if (!isQueueRunning.current) runQueue();
+    });
   };
 
   const handleInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-    const files = Array.from(e.target.files ?? []);
+    const files = Array.from(e.target.files ?? [], (file) => ({ file }));
     if (files.length > 0) enqueueFiles(files);
     e.target.value = "";
   };
 
   const handleDirInputChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-    const files = Array.from(e.target.files ?? []);
+    const files = Array.from(e.target.files ?? [], (file) => ({
+      file,
+      sourcePath: file.webkitRelativePath || undefined,
+    }));
     if (files.length > 0) enqueueFiles(files);
     e.target.value = "";
   };
@@ -539,6 +689,14 @@ export function KnowledgeBase() {
                               </span>
                             </>
                           )}
+                          {item.status === "checking" && (
+                            <>
+                              <Loader2 className="size-3.5 animate-spin text-muted-foreground shrink-0" />
+                              <span className="text-xs text-muted-foreground">
+                                Checking…
+                              </span>
+                            </>
+                          )}
                           {item.status === "pending" && (
                             <>
                               <div className="size-2 rounded-full bg-muted-foreground/40 shrink-0" />
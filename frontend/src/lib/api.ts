@@ -90,3 +90,56 @@ export function apiUploadWithProgress<T>(
     xhr.send(formData);
   });
 }
+
+const RESUMABLE_CHUNK_SIZE = 8 * 1024 * 1024; // 8 MB per PUT
+const RESUMABLE_MAX_RETRIES = 5;
+
+/**
+ * Upload a large file with the resumable protocol:
+ * create → PUT byte ranges → finalize. A failed range is retried from the
+ * offset the server reports, so a dropped connection never restarts from zero.
+ * Resolves with the finalize response (same shape as /ingest/upload).
+ */
+export async function apiResumableUpload<T>(
+  file: File,
+  onProgress: (percent: number) => void,
+  meta: { sha256?: string | null; sourcePath?: string } = {},
+): Promise<T> {
+  const session = await apiRequest<{ upload_id: string; offset: number }>(
+    "/ingest/uploads",
+    {
+      method: "POST",
+      body: JSON.stringify({
+        file_name: file.name,
+        size: file.size,
+        sha256: meta.sha256 ?? undefined,
+        source_path: meta.sourcePath,
+      }),
+    },
+  );
+  const uploadPath = `/ingest/uploads/${session.upload_id}`;
+
+  let offset = session.offset;
+  let retries = 0;
+  while (offset < file.size) {
+    const end = Math.min(offset + RESUMABLE_CHUNK_SIZE, file.size);
+    try {
+      const response = await fetch(`${API_BASE_URL}${uploadPath}`, {
+        method: "PUT",
+        headers: { "Content-Range": `bytes ${offset}-${end - 1}/${file.size}` },
+        body: file.slice(offset, end),
+      });
+      if (!response.ok) throw new Error(`Upload failed: ${response.statusText}`);
+      offset = (await response.json()).offset;
+      retries = 0;
+      onProgress(Math.round((offset / file.size) * 100));
+    } catch (err) {
+      if (++retries > RESUMABLE_MAX_RETRIES) throw err;
+      await new Promise((r) => setTimeout(r, 1000 * retries));
+      // Ask the server how much actually arrived and continue from there
+      offset = (await apiRequest<{ offset: number }>(uploadPath)).offset;
+    }
+  }
+
+  return apiRequest<T>(`${uploadPath}/finalize`, { method: "POST" });
+}